@@ -0,0 +1,117 @@
+"""
+Benchmark of AnnotationCropGenerator on images with dense, overlapping annotations.
+
+Places many polygons over one small region of an image (a fraction of them
+repeated with another artifact type, as when a region carries several
+labels) and compares three ways of computing every annotation's crops:
+
+  legacy   the per-annotation path before process_each: an int64 integral
+           image over the whole local mask and labelling of the full safe map
+  single   _process_annotation for each annotation (current kernel, no
+           deduplication)
+  each     process_each (current kernel, identical geometries computed once)
+
+Outputs are checked to be identical. Overlapping annotations are still
+computed one by one: each annotation's windows count only its own mask.
+
+    python scripts/bench_crop_overlap.py --annotations 20 40 80 --window 64
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+from scipy.ndimage import find_objects, label
+
+from artifacts_annotator.generators.crop_generator import AnnotationCropGenerator
+
+
+def legacy_crops(gen: AnnotationCropGenerator, mask: np.ndarray) -> list:
+    """_compute_local_crops as it was before the banded uint16 integral image."""
+    H, W = mask.shape
+    h, w = gen.window_size
+    min_count = gen.min_fraction * (h * w)
+    ii = np.pad(mask.astype(np.uint32), ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    sums = ii[h:, w:] - ii[:-h, w:] - ii[h:, :-w] + ii[:-h, :-w]
+    safe = sums >= min_count
+    if mask.sum() < min_count:
+        ys, xs = np.nonzero(mask)
+        yc = (ys.min() + ys.max()) // 2
+        xc = (xs.min() + xs.max()) // 2
+        top = int(np.clip(yc - h // 2, 0, H - h))
+        left = int(np.clip(xc - w // 2, 0, W - w))
+        return [(left, top, left + w, top + h)]
+    lm, num = label(safe)
+    return [
+        (xs.start, ys.start, xs.stop - 1 + w, ys.stop - 1 + h)
+        for ys, xs in (sl for sl in find_objects(lm, max_label=num) if sl is not None)
+    ]
+
+
+def legacy_all(gen: AnnotationCropGenerator) -> list:
+    results = []
+    for ann in gen.annotations:
+        mask, (ox, oy) = gen._create_local_mask_with_margin(ann)
+        crops = [(l + ox, t + oy, r + ox, b + oy) for l, t, r, b in legacy_crops(gen, mask)]
+        results.append(crops)
+    return results
+
+
+def dense_annotations(count: int, size: int, spread: int, duplicates: float) -> list[dict]:
+    """Polygons around the image centre, a fraction repeated with another type."""
+    rng = random.Random(0)
+    c = size / 2
+    anns = []
+    for _ in range(count):
+        cx, cy = c + rng.uniform(-spread, spread), c + rng.uniform(-spread, spread)
+        r = rng.uniform(spread / 2, spread)
+        pts = []
+        for k in range(8):
+            a = 2 * np.pi * k / 8
+            rr = r * rng.uniform(0.6, 1.0)
+            pts.append([cx + rr * np.cos(a), cy + rr * np.sin(a)])
+        anns.append({"type": "poly", "artifact_type": "A", "points": pts})
+        if rng.random() < duplicates:
+            anns.append({"type": "poly", "artifact_type": "B", "points": pts})
+    return anns
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=4096)
+    parser.add_argument("--window", type=int, default=64)
+    parser.add_argument("--spread", type=int, default=300)
+    parser.add_argument("--duplicates", type=float, default=0.25,
+                        help="fraction of regions labelled twice")
+    parser.add_argument("--annotations", type=int, nargs="+", default=[10, 20, 40, 80])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    win = (args.window, args.window)
+    print(f"{'annotations':>11} {'legacy [s]':>11} {'single [s]':>11} "
+          f"{'each [s]':>9} {'speedup':>8}")
+    for count in args.annotations:
+        anns = dense_annotations(count, args.size, args.spread, args.duplicates)
+        gen = AnnotationCropGenerator(anns, (args.size, args.size), window_size=win)
+        each = [crops for _, _, crops in gen.process_each()]
+        single = [gen._process_annotation(a)[2] for a in anns]
+        assert each == single == legacy_all(gen), "outputs differ"
+        t_old = timed(lambda: legacy_all(gen), args.repeat)
+        t_single = timed(lambda: [gen._process_annotation(a) for a in anns], args.repeat)
+        t_each = timed(gen.process_each, args.repeat)
+        print(f"{len(anns):>11} {t_old:>11.3f} {t_single:>11.3f} "
+              f"{t_each:>9.3f} {t_old / t_each:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Thumbnail throughput benchmark (images/sec).
+
+Compares the previous pipeline (full decode, LANCZOS thumbnail, PNG encode
+and decode round-trip) with render_thumbnail (EXIF thumbnails, reduced TIFF
+pages, JPEG draft decoding, box-reduce + bilinear, raw buffer output).
+Without --input a folder of synthetic 24 MP JPEGs is generated.
+
+    python scripts/bench_thumbnails.py --input /path/to/images
+    python scripts/bench_thumbnails.py --exif-thumbnails
+"""
+
+import argparse
+import io
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from artifacts_annotator.controllers.file_scanner import FileScanner
+from artifacts_annotator.generators.thumbnail_render import render_thumbnail
+
+
+def legacy_thumbnail(path: str, size: int) -> bytes:
+    """The pipeline used before render_thumbnail, minus the final QPixmap."""
+    img = Image.open(path)
+    img.thumbnail((size, size), resample=Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return Image.open(io.BytesIO(buf.getvalue())).tobytes()
+
+
+def current_thumbnail(path: str, size: int) -> bytes:
+    return render_thumbnail(path, size).tobytes()
+
+
+def exif_with_thumbnail(img: Image.Image) -> bytes:
+    """Minimal EXIF block whose IFD1 carries a 160px JPEG thumbnail, as cameras write."""
+    thumb = img.copy()
+    thumb.thumbnail((160, 160))
+    buf = io.BytesIO()
+    thumb.save(buf, format="JPEG", quality=85)
+    data = buf.getvalue()
+    ifd1 = 14
+    offset = ifd1 + 2 + 2 * 12 + 4
+    tiff = (
+        b"II*\x00" + struct.pack("<I", 8)
+        + struct.pack("<HI", 0, ifd1)                      # empty IFD0 -> IFD1
+        + struct.pack("<H", 2)
+        + struct.pack("<HHII", 0x0201, 4, 1, offset)       # JPEGInterchangeFormat
+        + struct.pack("<HHII", 0x0202, 4, 1, len(data))    # ...Length
+        + struct.pack("<I", 0)
+    )
+    return b"Exif\x00\x00" + tiff + data
+
+
+def synthetic_folder(count: int, width: int, height: int, exif: bool) -> str:
+    folder = tempfile.mkdtemp(prefix="thumb-bench-")
+    rng = np.random.default_rng(0)
+    # Smooth content so JPEG sizes resemble photographs.
+    base = rng.integers(0, 255, (height // 64 + 1, width // 64 + 1, 3), dtype=np.uint8)
+    for i in range(count):
+        img = Image.fromarray(np.roll(base, i, axis=1)).resize((width, height), Image.BILINEAR)
+        extra = {"exif": exif_with_thumbnail(img)} if exif else {}
+        img.save(os.path.join(folder, f"synthetic_{i:03d}.jpg"), quality=90, **extra)
+    return folder
+
+
+def throughput(fn, paths: list[str], size: int) -> float:
+    t0 = time.perf_counter()
+    for p in paths:
+        fn(p, size)
+    return len(paths) / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--input", help="folder of images (default: synthetic JPEGs)")
+    parser.add_argument("--count", type=int, default=20, help="synthetic image count")
+    parser.add_argument("--exif-thumbnails", action="store_true",
+                        help="embed camera-style EXIF thumbnails in synthetic JPEGs")
+    parser.add_argument("--size", type=int, default=128)
+    args = parser.parse_args()
+
+    folder = args.input or synthetic_folder(
+        args.count, 6000, 4000, args.exif_thumbnails
+    )
+    paths = FileScanner(folder).scan_files()
+    if not paths:
+        raise SystemExit(f"no images found in {folder}")
+    before = throughput(legacy_thumbnail, paths, args.size)
+    after = throughput(current_thumbnail, paths, args.size)
+    print(f"{len(paths)} images from {folder}")
+    print(f"before: {before:8.1f} images/s")
+    print(f"after:  {after:8.1f} images/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
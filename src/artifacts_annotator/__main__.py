@@ -0,0 +1,5 @@
+# src/artifacts_annotator/__main__.py
+import sys
+from artifacts_annotator.cli import main
+
+sys.exit(main())
@@ -2,16 +2,23 @@
 import os
 from typing import Optional, List
 from PyQt5.QtWidgets import (
-    QMainWindow, QAction, QWidget, QVBoxLayout, QFileDialog
+    QMainWindow, QAction, QActionGroup, QWidget, QVBoxLayout, QFileDialog
 )
-from PyQt5.QtCore import QSettings, QByteArray
+from PyQt5.QtCore import QSettings, QByteArray, QObject, Qt, pyqtSignal
 from .controllers.folder_dialog import FolderSelector
 from .controllers.file_scanner import FileScanner
-from .controllers.file_watcher import FileWatcher
+from .controllers.folder_index import FolderIndex
+from .controllers.scan_thread import ScanThread
+from .controllers.file_watcher import ChangeSet, FileWatcher
 from .views.thumbnail_grid import ThumbnailGrid
 from .views.image_viewer import ImageViewerWindow
+from .generators.thumbnail_cache import default_thumbnail_cache
 from .config import load_artifact_types
 
+class _WatcherBridge(QObject):
+    """Carries ChangeSets from the watcher's timer thread to the GUI thread."""
+    changed = pyqtSignal(str, object)  # watched folder, ChangeSet
+
 class MainWindow(QMainWindow):
     """Main window: folder browsing, thumbnail grid, launches viewer."""
     def __init__(self) -> None:
@@ -29,6 +36,17 @@ class MainWindow(QMainWindow):
         self.file_scanner: Optional[FileScanner] = None
         self.watcher: Optional[FileWatcher] = None
         self.viewer: Optional[ImageViewerWindow] = None
+        self.grid: Optional[ThumbnailGrid] = None
+        self.export_thread = None
+        self.scan_thread: Optional[ScanThread] = None
+        # True until the scan thread has reported the complete file list; the
+        # thread itself keeps running afterwards to probe image dimensions.
+        self._scanning = False
+        self.folder_index: Optional[FolderIndex] = None
+        # Indexes of previous folders still used by a running export
+        self._retired_indexes: List[FolderIndex] = []
+        self._watcher_bridge = _WatcherBridge(self)
+        self._watcher_bridge.changed.connect(self._on_folder_changed, Qt.QueuedConnection)
 
         self._init_ui()
         last = self.settings.value('lastFolder', type=str)
@@ -47,10 +65,36 @@ class MainWindow(QMainWindow):
         file_menu.addAction(export_act)
         self.export_act = export_act
 
+        cancel_act = QAction("Cancel Export", self)
+        cancel_act.setEnabled(False)
+        cancel_act.triggered.connect(self._cancel_export)
+        file_menu.addAction(cancel_act)
+        self.cancel_export_act = cancel_act
+
+        # Crop encoding: defaults to settings.yaml, the choice is remembered
+        from artifacts_annotator.controllers.crop_encoder import EncodingOptions
+        default = EncodingOptions.from_settings().format
+        self.export_encoding = self.settings.value('exportEncoding', default, type=str)
+        format_menu = file_menu.addMenu("Crop Format")
+        format_grp = QActionGroup(self)
+        format_grp.setExclusive(True)
+        for fmt, label in [('png', "PNG"), ('webp', "WebP (lossless)"),
+                           ('jpeg', "JPEG"), ('npy', "NumPy array (.npy)")]:
+            act = QAction(label, self)
+            act.setCheckable(True)
+            act.setChecked(fmt == self.export_encoding)
+            act.toggled.connect(lambda chk, f=fmt: chk and self._set_export_encoding(f))
+            format_grp.addAction(act)
+            format_menu.addAction(act)
+
         self.container = QWidget()
         self.layout = QVBoxLayout(self.container)
         self.setCentralWidget(self.container)
 
+    def _set_export_encoding(self, fmt: str) -> None:
+        self.export_encoding = fmt
+        self.settings.setValue('exportEncoding', fmt)
+
     def _on_open_folder(self) -> None:
         init = self.settings.value('lastFolder', os.path.expanduser('~'))
         folder = QFileDialog.getExistingDirectory(self, "Select Image Folder", init)
@@ -62,10 +106,17 @@ class MainWindow(QMainWindow):
         self.current_folder = folder
         if self.watcher:
             self.watcher.stop()
+        self._stop_scan()
+        self._retire_index()
         self.file_scanner = FileScanner(folder)
-        self.files = self.file_scanner.scan_files()
-        self.export_act.setEnabled(bool(self.files))
-        # clear old grid
+        # Show what was indexed last time right away; the scan thread then
+        # reconciles the index with the filesystem.
+        self.folder_index = FolderIndex.from_settings(folder)
+        self.files = self.folder_index.files() if self.folder_index else []
+        self.export_act.setEnabled(False)
+        # clear old grid, cancelling its pending thumbnail work
+        if self.grid is not None:
+            self.grid.clear()
         for i in reversed(range(self.layout.count())):
             w = self.layout.itemAt(i).widget()
             if w:
@@ -73,70 +124,182 @@ class MainWindow(QMainWindow):
         self.grid = ThumbnailGrid(self.files)
         self.grid.thumbnail_clicked.connect(self._on_thumbnail_clicked)
         self.layout.addWidget(self.grid)
-        self.watcher = FileWatcher(folder, self._on_folder_changed)
+        # Watch before scanning so nothing created mid-scan is missed;
+        # both paths tolerate files they already know about.
+        self.watcher = FileWatcher(
+            folder, lambda changes: self._watcher_bridge.changed.emit(folder, changes),
+            scanner=self.file_scanner
+        )
         self.watcher.start()
+        self.scan_thread = ScanThread(self.file_scanner, self.folder_index, parent=self)
+        self.scan_thread.found.connect(self._on_scan_found)
+        self.scan_thread.lost.connect(self._on_scan_lost)
+        self.scan_thread.completed.connect(self._on_scan_completed)
+        self.scan_thread.finished.connect(self._on_scan_finished)
+        self._scanning = True
+        self.scan_thread.start()
+
+    def _stop_scan(self) -> None:
+        """Cancel the scan thread and wait until it no longer uses the index."""
+        if self.scan_thread is not None:
+            self.scan_thread.cancel()
+            self.scan_thread.wait()
+            self.scan_thread.deleteLater()
+            self.scan_thread = None
+        self._scanning = False
 
-    def _on_folder_changed(self) -> None:
-        if self.file_scanner and self.current_folder:
-            new_files = self.file_scanner.scan_files()
-            if new_files != self.files:
-                self.files = new_files
-                self.grid.clear()
-                self.grid.populate(self.files)
+    def _retire_index(self) -> None:
+        """Close the current folder index, or once the export using it ends."""
+        if self.folder_index is None:
+            return
+        if self.export_thread is not None:
+            self._retired_indexes.append(self.folder_index)
+        else:
+            self.folder_index.close()
+        self.folder_index = None
+
+    def _on_scan_found(self, batch: List[str]) -> None:
+        if self.sender() is not self.scan_thread:
+            return
+        known = set(self.files)
+        new = [p for p in batch if p not in known]
+        if new:
+            self.files.extend(new)
+            self.files.sort()
+            self.grid.add_paths(new)
+
+    def _on_scan_lost(self, batch: List[str]) -> None:
+        if self.sender() is not self.scan_thread:
+            return
+        gone = set(batch)
+        self.files[:] = [p for p in self.files if p not in gone]
+        self.grid.remove_paths(batch)
+
+    def _on_scan_completed(self, files: List[str]) -> None:
+        if self.sender() is not self.scan_thread:
+            return
+        self._scanning = False
+        self.export_act.setEnabled(bool(self.files) and self.export_thread is None)
+
+    def _on_scan_finished(self) -> None:
+        # Dimension probing is done too; the thread no longer touches the index.
+        if self.scan_thread is None or self.sender() is not self.scan_thread:
+            return
+        self.scan_thread.deleteLater()
+        self.scan_thread = None
+        self._scanning = False
+
+    def _on_folder_changed(self, folder: str, changes: ChangeSet) -> None:
+        # Batches queued by a watcher that has since been replaced are dropped.
+        if folder != self.current_folder or self.grid is None:
+            return
+        added, removed, modified = changes.apply(self.files, self.file_scanner)
+        if removed:
+            self.grid.remove_paths(removed)
+        if added:
+            self.grid.add_paths(added)
+        if modified:
+            self.grid.refresh_paths(modified)
+        if not self._scanning:
+            self.export_act.setEnabled(bool(self.files) and self.export_thread is None)
 
     def _on_thumbnail_clicked(self, path: str) -> None:
-        idx = self.files.index(path)
+        # The viewer gets a snapshot: self.files is updated in place by the
+        # scanner and watcher, which must not shift the viewer's index.
+        files = list(self.files)
+        idx = files.index(path)
         if self.viewer is None:
-            self.viewer = ImageViewerWindow(self.files, idx)
+            self.viewer = ImageViewerWindow(files, idx, self.current_folder)
         else:
-            self.viewer.update_images(self.files, idx)
+            self.viewer.update_images(files, idx, self.current_folder)
         self.viewer.show()
         self.viewer.raise_()
 
     def closeEvent(self, event) -> None:
         self.settings.setValue('geometry', self.saveGeometry())
+        if self.viewer is not None:
+            self.viewer.flush_annotations()
         if self.current_folder:
             self.settings.setValue('lastFolder', self.current_folder)
         if self.watcher:
             self.watcher.stop()
+        self._stop_scan()
+        cache = default_thumbnail_cache()
+        if cache is not None:
+            cache.flush()
+        if self.export_thread is not None:
+            self.export_thread.cancel()
+            self.export_thread.wait()
+        self._close_retired_indexes()
+        if self.folder_index is not None:
+            self.folder_index.close()
+            self.folder_index = None
         super().closeEvent(event)
 
     def _export_crops(self) -> None:
         """
         Batch-export all annotated crops + JSON metadata
-        into a user-selected directory.
+        into a user-selected directory, on a background thread.
         """
-        from pathlib import Path
-        from PIL import Image
         from PyQt5.QtWidgets import QFileDialog
-        from artifacts_annotator.controllers.annotation_manager import AnnotationManager
-        from artifacts_annotator.generators.crop_generator import AnnotationCropGenerator
-        from artifacts_annotator.controllers.output_writer import write_crops_and_metadata
+        from artifacts_annotator.controllers.crop_encoder import EncodingOptions
+        from artifacts_annotator.controllers.export_engine import ExportEngine
+        from artifacts_annotator.controllers.export_thread import ExportThread
+
+        if self.export_thread is not None:
+            return
 
         # 1. ask for target folder
         out_dir = QFileDialog.getExistingDirectory(self, "Select output folder", os.path.expanduser("~"))
         if not out_dir:
             return
-        out_path = Path(out_dir)
 
-        # 2. prepare the annotation loader
-        ann_mgr = AnnotationManager(self.current_folder)
-        total = len(self.files)
+        # 2. make sure edits still being saved by the viewer are on disk
+        if self.viewer is not None:
+            self.viewer.flush_annotations()
 
-        # 3. loop through each image
-        for idx, img_path_str in enumerate(self.files, start=1):
-            self.statusBar().showMessage(f"Exporting {idx}/{total}: {img_path_str}")
-            img_path = Path(img_path_str)
+        # 3. run the engine off the GUI thread
+        engine = ExportEngine(
+            out_dir, annotation_folder=self.current_folder or "", index=self.folder_index,
+            encoding=EncodingOptions.from_settings(format=self.export_encoding)
+        )
+        self.export_thread = ExportThread(engine, self.files, self)
+        self.export_thread.progress.connect(self._on_export_progress)
+        self.export_thread.completed.connect(self._on_export_finished)
+        self.export_act.setEnabled(False)
+        self.cancel_export_act.setEnabled(True)
+        self.statusBar().showMessage(f"Exporting {len(self.files)} images…")
+        self.export_thread.start()
 
-            # load annotations from .json or in-memory
-            annotations = ann_mgr.load(str(img_path))
+    def _close_retired_indexes(self) -> None:
+        for index in self._retired_indexes:
+            index.close()
+        self._retired_indexes = []
 
-            # init generator with the image size
-            size = Image.open(img_path).size
-            gen = AnnotationCropGenerator(annotations, image_size=size)
+    def _cancel_export(self) -> None:
+        if self.export_thread is not None:
+            self.statusBar().showMessage("Cancelling export…")
+            self.export_thread.cancel()
 
-            # write crops + metadata into the chosen folder
-            write_crops_and_metadata(img_path, gen, out_path)
+    def _on_export_progress(self, done: int, total: int, path: str) -> None:
+        self.statusBar().showMessage(f"Exporting {done}/{total}: {path}")
 
-        # 4. done
-        self.statusBar().showMessage("Export complete!", 3000)
\ No newline at end of file
+    def _on_export_finished(self, summary) -> None:
+        self.export_thread.wait()
+        self.export_thread = None
+        self._close_retired_indexes()
+        self.export_act.setEnabled(bool(self.files) and not self._scanning)
+        self.cancel_export_act.setEnabled(False)
+        if summary.error is not None:
+            self.statusBar().showMessage(f"Export failed: {summary.error}")
+            return
+        if summary.cancelled:
+            msg = f"Export cancelled ({summary.exported}/{summary.total} images)"
+        elif summary.failed:
+            msg = f"Export finished with {len(summary.failed)} failures"
+        else:
+            msg = f"Export complete! ({summary.skipped} unchanged images skipped)"
+        written = sum(s.bytes for s in summary.encoded.values())
+        if written:
+            msg += f", {written / (1 << 20):.1f} MiB written"
+        self.statusBar().showMessage(msg, 5000)
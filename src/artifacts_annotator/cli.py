@@ -0,0 +1,204 @@
+# src/artifacts_annotator/cli.py
+"""
+Command-line entry point.
+
+`artifacts-annotator export ...` runs a headless crop export and never imports
+PyQt5; `artifacts-annotator annotations import|export ...` moves annotations
+between JSON sidecars and a dataset database; `artifacts-annotator gui` (the
+default) starts the Qt application.
+"""
+
+import argparse
+import sys
+from typing import Optional, Sequence
+
+
+def _parse_window(value: str) -> tuple[int, int]:
+    """Parse a window size given as 'WxH' or a single 'N'."""
+    try:
+        parts = [int(p) for p in value.lower().split("x")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid window size: {value!r}")
+    if len(parts) == 1:
+        parts *= 2
+    if len(parts) != 2 or min(parts) <= 0:
+        raise argparse.ArgumentTypeError(f"invalid window size: {value!r}")
+    return parts[0], parts[1]
+
+
+def _parse_config(value: str) -> tuple[tuple[int, int], float]:
+    """Parse an export configuration given as 'WxH:FRACTION' (e.g. '128x128:0.5')."""
+    window, sep, fraction = value.partition(":")
+    try:
+        min_fraction = float(fraction)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid configuration: {value!r}")
+    if not sep or not 0 <= min_fraction <= 1:
+        raise argparse.ArgumentTypeError(f"invalid configuration: {value!r}")
+    return _parse_window(window), min_fraction
+
+
+def _parse_jpeg_quality(value: str) -> int:
+    """Parse a JPEG quality in 1-95."""
+    try:
+        quality = int(value)
+    except ValueError:
+        quality = 0
+    if not 1 <= quality <= 95:
+        raise argparse.ArgumentTypeError(f"JPEG quality must be in 1-95: {value!r}")
+    return quality
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="artifacts-annotator")
+    sub = parser.add_subparsers(dest="command")
+
+    sub.add_parser("gui", help="start the annotation GUI (default)")
+
+    exp = sub.add_parser("export", help="export crops and metadata without a display")
+    exp.add_argument("--input", "-i", required=True, help="dataset root folder")
+    exp.add_argument("--output", "-o", required=True, help="output folder")
+    exp.add_argument("--workers", "-j", type=int, default=None,
+                     help="worker processes (default: CPU count)")
+    exp.add_argument("--window", type=_parse_window, default=(128, 128),
+                     help="crop window as WxH (default: 128x128)")
+    exp.add_argument("--min-fraction", type=float, default=0.5,
+                     help="minimum mask coverage per sub-crop (default: 0.5)")
+    exp.add_argument("--ext", default=None,
+                     help="crop file extension; also selects the encoding (default: .png)")
+    exp.add_argument("--encoding", choices=["png", "webp", "jpeg", "npy"], default=None,
+                     help="crop encoding (default: export_encoding setting, else png)")
+    exp.add_argument("--png-level", type=int, choices=range(10), default=None, metavar="0-9",
+                     help="PNG compression level; lower is faster (default: 6)")
+    exp.add_argument("--webp-lossy", action="store_true", help="encode WebP lossily")
+    exp.add_argument("--jpeg-quality", type=_parse_jpeg_quality, default=None,
+                     help="JPEG quality 1-95 (default: 95)")
+    exp.add_argument("--format", choices=["files", "shards", "virtual"], default=None,
+                     help="one file per crop, packed shards, or a crops.csv of boxes "
+                          "only (default: export_format setting, else files)")
+    exp.add_argument("--config", type=_parse_config, action="append", default=None,
+                     metavar="WxH:FRACTION",
+                     help="export this window/min-fraction configuration into its own "
+                          "subfolder; repeat to export several in one pass (overrides "
+                          "--window and --min-fraction, files format only)")
+    exp.add_argument("--full", action="store_true",
+                     help="regenerate every image instead of only changed ones")
+    exp.add_argument("--quiet", "-q", action="store_true", help="do not print progress")
+
+    ann = sub.add_parser("annotations",
+                         help="convert annotations between JSON sidecars and a database")
+    ann.add_argument("action", choices=["import", "export"],
+                     help="import: sidecars -> database; export: database -> sidecars")
+    ann.add_argument("--input", "-i", required=True, help="dataset root folder")
+    ann.add_argument("--db", default=None,
+                     help="database file (default: .annotations.sqlite in the root)")
+    return parser
+
+
+def _encoding_options(args: argparse.Namespace):
+    """EncodingOptions from the settings, overridden by command-line flags."""
+    from dataclasses import replace
+    from artifacts_annotator.controllers.crop_encoder import EncodingOptions
+
+    options = EncodingOptions.from_settings(format=args.encoding, extension=args.ext)
+    overrides = {}
+    if args.png_level is not None:
+        overrides["png_compress_level"] = args.png_level
+    if args.webp_lossy:
+        overrides["webp_lossless"] = False
+    if args.jpeg_quality is not None:
+        overrides["jpeg_quality"] = args.jpeg_quality
+    return replace(options, **overrides)
+
+
+def _run_export(args: argparse.Namespace) -> int:
+    from artifacts_annotator.controllers.file_scanner import FileScanner
+    from artifacts_annotator.controllers.folder_index import FolderIndex
+    from artifacts_annotator.controllers.export_engine import ExportEngine
+
+    scanner = FileScanner(args.input)
+    index = FolderIndex.from_settings(args.input)
+    if index is not None:
+        # Only directories that changed since the last run are re-listed.
+        for _ in index.reconcile(scanner):
+            pass
+        files = index.files()
+    else:
+        files = scanner.scan_files()
+    engine = ExportEngine(
+        args.output,
+        annotation_folder=args.input,
+        window_size=args.window,
+        min_fraction=args.min_fraction,
+        workers=args.workers,
+        incremental=not args.full,
+        index=index,
+        output_format=args.format or ("files" if args.config else None),
+        encoding=_encoding_options(args),
+        configs=args.config
+    )
+
+    def progress(done: int, total: int, path: str) -> None:
+        print(f"[{done}/{total}] {path}", file=sys.stderr)
+
+    try:
+        summary = engine.run(files, progress=None if args.quiet else progress)
+    except KeyboardInterrupt:
+        print("export interrupted", file=sys.stderr)
+        return 130
+    if not args.quiet:
+        for line in summary.stages:
+            print(line, file=sys.stderr)
+        for fmt, stats in summary.encoded.items():
+            print(stats.describe(fmt), file=sys.stderr)
+    for path, err in summary.failed:
+        print(f"failed: {path}: {err}", file=sys.stderr)
+    print(f"exported {summary.exported}/{summary.total} images "
+          f"({summary.skipped} unchanged) to {args.output}")
+    return 1 if summary.failed else 0
+
+
+def _run_annotations(args: argparse.Namespace) -> int:
+    from artifacts_annotator.controllers.annotation_store import (
+        SQLiteStore, SidecarStore, copy_annotations
+    )
+    from artifacts_annotator.controllers.file_scanner import FileScanner
+
+    sidecars = SidecarStore(args.input)
+    database = SQLiteStore(args.input, args.db)
+    try:
+        if args.action == "import":
+            count = copy_annotations(sidecars, database, FileScanner(args.input).scan_files())
+        else:
+            count = copy_annotations(database, sidecars)
+    finally:
+        database.close()
+    print(f"{args.action}ed annotations of {count} images ({database.db_path})")
+    return 0
+
+
+def _run_gui() -> int:
+    from PyQt5.QtWidgets import QApplication
+    from artifacts_annotator.app import MainWindow
+
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    return app.exec_()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Parse arguments and dispatch to a subcommand."""
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "export" and args.config and args.format not in (None, "files"):
+        parser.error("--config requires --format files")
+    if args.command == "export":
+        return _run_export(args)
+    if args.command == "annotations":
+        return _run_annotations(args)
+    return _run_gui()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
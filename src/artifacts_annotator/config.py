@@ -4,6 +4,7 @@ Module for loading artifact type definitions and their associated colors.
 """
 
 import os
+import sys
 from itertools import cycle
 
 import yaml
@@ -16,6 +17,49 @@ DEFAULT_COLORS = [
     "#000080","#808080"
 ]
 
+def load_settings(settings_path="settings.yaml"):
+    """
+    Load the raw settings mapping from a YAML file.
+
+    Missing or unreadable files yield an empty mapping so callers can
+    fall back to their defaults.
+
+    Args:
+        settings_path (str): Path to the YAML settings file.
+
+    Returns:
+        dict: Parsed settings.
+    """
+    if not os.path.exists(settings_path):
+        return {}
+    try:
+        with open(settings_path) as f:
+            data = yaml.safe_load(f) or {}
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def user_cache_dir(*parts):
+    """
+    Return (and create) the per-user cache directory of the application.
+
+    Uses %LOCALAPPDATA% on Windows and $XDG_CACHE_HOME (default ~/.cache)
+    elsewhere.
+
+    Args:
+        *parts (str): Optional sub-directory components.
+
+    Returns:
+        str: Absolute directory path.
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    path = os.path.join(base, "artifacts-annotator", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
 def load_artifact_types(settings_path="settings.yaml"):
     """
     Load artifact types and their colors from a YAML settings file.
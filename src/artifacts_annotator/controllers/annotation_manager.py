@@ -1,27 +1,42 @@
 # src/my_package_name/controllers/annotation_manager.py
-import os
-import json
-from typing import List, Dict, Union
+from typing import Dict, Iterable, List, Optional
 
-Annotation = Dict[str, Union[str, List[List[float]]]]
+from artifacts_annotator.controllers.annotation_store import (
+    Annotation, AnnotationStore, open_store, sidecar_path
+)
 
 class AnnotationManager:
-    """Loads/saves per-image JSON annotations."""
-    def __init__(self, folder: str) -> None:
+    """
+    Loads/saves per-image annotations.
+
+    Storage is delegated to an AnnotationStore: per-image JSON sidecars by
+    default, or one database per dataset (see `annotation_store` in
+    settings.yaml).
+    """
+    def __init__(self, folder: str, store: Optional[AnnotationStore] = None) -> None:
         self.folder = folder
+        self.store = store or open_store(folder)
 
     def annotation_path(self, image_path: str) -> str:
-        base, _ = os.path.splitext(image_path)
-        return base + '.json'
+        return sidecar_path(image_path)
 
     def load(self, image_path: str) -> List[Annotation]:
-        path = self.annotation_path(image_path)
-        if not os.path.exists(path):
-            return []
-        with open(path, 'r') as f:
-            return json.load(f)
+        return self.store.load(image_path)
 
     def save(self, image_path: str, annotations: List[Annotation]) -> None:
-        path = self.annotation_path(image_path)
-        with open(path, 'w') as f:
-            json.dump(annotations, f, indent=2)
+        self.store.save(image_path, annotations)
+
+    def load_all(self, image_paths: Optional[Iterable[str]] = None) -> Dict[str, List[Annotation]]:
+        """Annotations of every annotated image (or of `image_paths`), by path."""
+        return self.store.load_all(image_paths)
+
+    def query_by_type(
+        self,
+        artifact_type: str,
+        image_paths: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[Annotation]]:
+        """Annotations of one artifact type, by image path."""
+        return self.store.query_by_type(artifact_type, image_paths)
+
+    def close(self) -> None:
+        self.store.close()
@@ -0,0 +1,85 @@
+# src/artifacts_annotator/controllers/annotation_save_queue.py
+"""
+Background, coalescing annotation writer (Qt-free).
+
+The viewer hands over a snapshot of an image's annotations and moves on;
+a single worker thread writes them through the AnnotationManager. If an
+image is submitted again before its previous snapshot was written, only
+the newest one is written.
+"""
+
+import copy
+import threading
+from typing import Optional
+
+from artifacts_annotator.controllers.annotation_manager import Annotation, AnnotationManager
+
+
+class AnnotationSaveQueue:
+    """Writes annotation snapshots on a worker thread, newest-wins per image."""
+    def __init__(self, ann_mgr: AnnotationManager) -> None:
+        self.ann_mgr = ann_mgr
+        self.errors: list[tuple[str, str]] = []
+        self._pending: dict[str, list[Annotation]] = {}
+        self._writing: Optional[str] = None
+        self._writing_data: Optional[list[Annotation]] = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="annotation-save", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, image_path: str, annotations: list[Annotation]) -> None:
+        """Queue a save of a snapshot of `annotations` for `image_path`."""
+        snapshot = copy.deepcopy(annotations)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("save queue is closed")
+            self._pending[image_path] = snapshot
+            self._cond.notify_all()
+
+    def pending(self, image_path: str) -> Optional[list[Annotation]]:
+        """
+        The not-yet-written annotations of an image (a copy), or None.
+
+        Readers must prefer this over the file on disk, which may be stale.
+        """
+        with self._cond:
+            anns = self._pending.get(image_path)
+            if anns is None and self._writing == image_path:
+                anns = self._writing_data
+            return copy.deepcopy(anns) if anns is not None else None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted so far is written. False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and self._writing is None, timeout
+            )
+
+    def close(self) -> None:
+        """Write what is pending and stop the worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                path = next(iter(self._pending))
+                annotations = self._pending.pop(path)
+                self._writing, self._writing_data = path, annotations
+            try:
+                self.ann_mgr.save(path, annotations)
+            except Exception as exc:
+                with self._cond:
+                    self.errors.append((path, repr(exc)))
+            finally:
+                with self._cond:
+                    self._writing, self._writing_data = None, None
+                    self._cond.notify_all()
@@ -0,0 +1,263 @@
+# src/artifacts_annotator/controllers/annotation_store.py
+"""
+Storage backends for per-image annotations (Qt-free).
+
+  * SidecarStore keeps one `<image>.json` file next to every image (the
+    original format, still the default).
+  * SQLiteStore keeps every image's annotations in one database file in the
+    dataset root, so dataset-wide operations (bulk load, queries by
+    artifact type) open one file instead of one per image.
+
+Both expose the same load/save API; `copy_annotations` converts between
+them.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Union
+
+from artifacts_annotator.config import load_settings
+
+Annotation = Dict[str, Union[str, List[List[float]]]]
+
+DEFAULT_DB_NAME = ".annotations.sqlite"
+BACKENDS = ("sidecar", "sqlite")
+
+
+def sidecar_path(image_path: str) -> str:
+    """The JSON sidecar of an image: same path with a .json extension."""
+    base, _ = os.path.splitext(image_path)
+    return base + '.json'
+
+
+class AnnotationStore:
+    """
+    Base class of the annotation backends.
+
+    `bulk_load` is True when `load_all` is cheaper than one `load` per
+    image, i.e. when the whole dataset lives in one file.
+    """
+    bulk_load = False
+
+    def load(self, image_path: str) -> List[Annotation]:
+        raise NotImplementedError
+
+    def save(self, image_path: str, annotations: List[Annotation]) -> None:
+        raise NotImplementedError
+
+    def save_many(self, items: Iterable[tuple[str, List[Annotation]]]) -> int:
+        """Save several images at once; returns how many were written."""
+        count = 0
+        for image_path, annotations in items:
+            self.save(image_path, annotations)
+            count += 1
+        return count
+
+    def load_all(self, image_paths: Optional[Iterable[str]] = None) -> Dict[str, List[Annotation]]:
+        """
+        Annotations of every annotated image, keyed by image path.
+
+        Args:
+            image_paths: Restrict the result to these images (default: all
+                images of the dataset).
+        """
+        raise NotImplementedError
+
+    def query_by_type(
+        self,
+        artifact_type: str,
+        image_paths: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[Annotation]]:
+        """The annotations of one artifact type, keyed by image path."""
+        result = {}
+        for path, anns in self.load_all(image_paths).items():
+            matching = [a for a in anns if a.get('artifact_type') == artifact_type]
+            if matching:
+                result[path] = matching
+        return result
+
+    def close(self) -> None:
+        pass
+
+
+class SidecarStore(AnnotationStore):
+    """One JSON file per image, next to the image."""
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def load(self, image_path: str) -> List[Annotation]:
+        path = sidecar_path(image_path)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def save(self, image_path: str, annotations: List[Annotation]) -> None:
+        """Write atomically: a crash mid-write never leaves a truncated file."""
+        path = sidecar_path(image_path)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(annotations, f, indent=2)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def load_all(self, image_paths: Optional[Iterable[str]] = None) -> Dict[str, List[Annotation]]:
+        if image_paths is None:
+            from artifacts_annotator.controllers.file_scanner import FileScanner
+            image_paths = FileScanner(self.root).scan_files()
+        result = {}
+        for path in image_paths:
+            anns = self.load(path)
+            if anns:
+                result[path] = anns
+        return result
+
+
+class SQLiteStore(AnnotationStore):
+    """
+    All annotations of a dataset in one SQLite file.
+
+    Rows are keyed by the image path relative to the dataset root (with '/'
+    separators), so the dataset can be moved or mounted elsewhere. Images
+    outside the root are keyed by their absolute path. Safe to share
+    between threads.
+    """
+    bulk_load = True
+
+    def __init__(self, root: str, db_path: Optional[str] = None) -> None:
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or os.path.join(self.root, DEFAULT_DB_NAME)
+        self._lock = threading.Lock()
+        # The default rollback journal is kept on purpose: WAL needs shared
+        # memory, which network file systems do not provide.
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._db:
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS annotations (
+                    image TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS artifact_types (
+                    artifact_type TEXT NOT NULL,
+                    image TEXT NOT NULL,
+                    PRIMARY KEY (artifact_type, image)
+                ) WITHOUT ROWID;
+            """)
+
+    def load(self, image_path: str) -> List[Annotation]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM annotations WHERE image = ?", (self._key(image_path),)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def save(self, image_path: str, annotations: List[Annotation]) -> None:
+        self.save_many([(image_path, annotations)])
+
+    def save_many(self, items: Iterable[tuple[str, List[Annotation]]]) -> int:
+        """Save several images in a single transaction."""
+        count = 0
+        with self._lock, self._db:
+            for image_path, annotations in items:
+                self._write(self._key(image_path), annotations)
+                count += 1
+        return count
+
+    def load_all(self, image_paths: Optional[Iterable[str]] = None) -> Dict[str, List[Annotation]]:
+        with self._lock:
+            rows = self._db.execute("SELECT image, data FROM annotations").fetchall()
+        return self._select(rows, image_paths)
+
+    def query_by_type(
+        self,
+        artifact_type: str,
+        image_paths: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[Annotation]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT a.image, a.data FROM artifact_types t "
+                "JOIN annotations a ON a.image = t.image WHERE t.artifact_type = ?",
+                (artifact_type,)
+            ).fetchall()
+        return {
+            path: [a for a in anns if a.get('artifact_type') == artifact_type]
+            for path, anns in self._select(rows, image_paths).items()
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _write(self, key: str, annotations: List[Annotation]) -> None:
+        self._db.execute("DELETE FROM artifact_types WHERE image = ?", (key,))
+        if not annotations:
+            self._db.execute("DELETE FROM annotations WHERE image = ?", (key,))
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO annotations (image, data) VALUES (?, ?)",
+            (key, json.dumps(annotations, separators=(",", ":")))
+        )
+        types = {a.get('artifact_type') for a in annotations} - {None}
+        self._db.executemany(
+            "INSERT INTO artifact_types (artifact_type, image) VALUES (?, ?)",
+            [(t, key) for t in types]
+        )
+
+    def _select(self, rows, image_paths: Optional[Iterable[str]]) -> Dict[str, List[Annotation]]:
+        if image_paths is None:
+            return {self._path(key): json.loads(data) for key, data in rows}
+        wanted = {self._key(p): p for p in image_paths}
+        return {wanted[key]: json.loads(data) for key, data in rows if key in wanted}
+
+    def _key(self, image_path: str) -> str:
+        path = os.path.abspath(image_path)
+        rel = os.path.relpath(path, self.root)
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return path
+        return rel.replace(os.sep, '/')
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split('/'))
+
+
+def open_store(root: str, backend: Optional[str] = None) -> AnnotationStore:
+    """
+    Open the annotation store of a dataset root as configured in settings.
+
+    settings.yaml may define:
+      annotation_store:
+        backend: sidecar | sqlite
+        path: database file, relative to the root (sqlite only)
+
+    Args:
+        root: Dataset root folder.
+        backend: Override the configured backend.
+    """
+    cfg = load_settings().get("annotation_store") or {}
+    backend = backend or cfg.get("backend", "sidecar")
+    if backend == "sqlite":
+        db_path = cfg.get("path")
+        if db_path:
+            db_path = os.path.join(root, os.path.expanduser(db_path))
+        return SQLiteStore(root, db_path)
+    if backend == "sidecar":
+        return SidecarStore(root)
+    raise ValueError(f"unknown annotation store backend: {backend!r}")
+
+
+def copy_annotations(
+    src: AnnotationStore,
+    dst: AnnotationStore,
+    image_paths: Optional[Iterable[str]] = None
+) -> int:
+    """
+    Copy annotations between stores, e.g. import sidecars into a database
+    or export a database back to sidecars. Returns the number of images copied.
+    """
+    return dst.save_many(src.load_all(image_paths).items())
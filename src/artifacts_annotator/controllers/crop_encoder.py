@@ -0,0 +1,206 @@
+# src/artifacts_annotator/controllers/crop_encoder.py
+"""
+Crop file encoding: format options, a parallel encoder and its statistics.
+
+settings.yaml may define:
+  export_encoding:
+    format: png | webp | jpeg | npy
+    png_compress_level: 0-9 (zlib level; 1 is several times faster than 6)
+    webp_lossless: True
+    webp_quality: 0-100 (effort when lossless)
+    jpeg_quality: 1-95
+    threads: encoder threads per process
+
+Pillow releases the GIL while encoding, so the crops of an image are
+encoded concurrently on a thread pool.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from artifacts_annotator.config import load_settings
+
+# encoding format -> file extension
+FORMATS = {"png": ".png", "webp": ".webp", "jpeg": ".jpg", "npy": ".npy"}
+
+
+def format_for_ext(ext: str) -> str:
+    """Encoding format of a file extension (e.g. ".jpeg" -> "jpeg")."""
+    ext = ext.lower()
+    if ext in (".jpg", ".jpeg"):
+        return "jpeg"
+    return ext.lstrip(".")
+
+
+@dataclass(frozen=True)
+class EncodingOptions:
+    """How crop files are encoded. Formats other than FORMATS use Pillow defaults."""
+    format: str = "png"
+    png_compress_level: int = 6
+    webp_lossless: bool = True
+    webp_quality: int = 80
+    jpeg_quality: int = 95
+    # Extension overriding FORMATS[format], e.g. ".jpeg"
+    extension: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.jpeg_quality <= 95:
+            raise ValueError(f"jpeg_quality must be in 1-95: {self.jpeg_quality}")
+        if not 0 <= self.png_compress_level <= 9:
+            raise ValueError(f"png_compress_level must be in 0-9: {self.png_compress_level}")
+
+    @classmethod
+    def from_settings(
+        cls,
+        format: Optional[str] = None,
+        extension: Optional[str] = None
+    ) -> "EncodingOptions":
+        """
+        Options from the 'export_encoding' settings.
+
+        Args:
+            format: Override the configured format.
+            extension: Output extension; also selects the format when
+                `format` is not given.
+        """
+        cfg = load_settings().get("export_encoding") or {}
+        if format is None and extension is not None:
+            format = format_for_ext(extension)
+        defaults = cls()
+        return cls(
+            format=str(format or cfg.get("format", defaults.format)).lower(),
+            png_compress_level=int(cfg.get("png_compress_level", defaults.png_compress_level)),
+            webp_lossless=bool(cfg.get("webp_lossless", defaults.webp_lossless)),
+            webp_quality=int(cfg.get("webp_quality", defaults.webp_quality)),
+            jpeg_quality=int(cfg.get("jpeg_quality", defaults.jpeg_quality)),
+            extension=extension,
+        )
+
+    @property
+    def ext(self) -> str:
+        return self.extension or FORMATS.get(self.format, "." + self.format)
+
+    def with_format(self, format: str) -> "EncodingOptions":
+        return replace(self, format=format, extension=None)
+
+    def fingerprint(self) -> dict:
+        """The options that affect the written bytes (for the export manifest)."""
+        data = {"format": self.format, "ext": self.ext}
+        if self.format == "png":
+            data["png_compress_level"] = self.png_compress_level
+        elif self.format == "webp":
+            data.update(webp_lossless=self.webp_lossless, webp_quality=self.webp_quality)
+        elif self.format == "jpeg":
+            data["jpeg_quality"] = self.jpeg_quality
+        return data
+
+    def save(self, patch: Image.Image, path: Path) -> None:
+        """Encode one crop to `path`."""
+        if self.format == "npy":
+            # Through a handle: np.save appends ".npy" to other file names.
+            with open(path, "wb") as f:
+                np.save(f, np.asarray(patch))
+        elif self.format == "png":
+            patch.save(path, format="PNG", compress_level=self.png_compress_level)
+        elif self.format == "webp":
+            patch.save(path, format="WEBP", lossless=self.webp_lossless,
+                       quality=self.webp_quality)
+        elif self.format == "jpeg":
+            patch.save(path, format="JPEG", quality=self.jpeg_quality)
+        else:
+            patch.save(path)
+
+
+@dataclass
+class EncodeStats:
+    """Files, bytes and encode time (summed over threads) of one format."""
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    def add(self, other: "EncodeStats") -> None:
+        self.files += other.files
+        self.bytes += other.bytes
+        self.seconds += other.seconds
+
+    def describe(self, format: str) -> str:
+        return (f"{format}: {self.files} crops, {self.bytes / (1 << 20):.1f} MiB, "
+                f"{self.seconds:.1f} s encoding")
+
+
+def merge_stats(total: dict[str, EncodeStats], part: dict[str, EncodeStats]) -> None:
+    """Add per-format stats `part` into `total`."""
+    for fmt, stats in part.items():
+        total.setdefault(fmt, EncodeStats()).add(stats)
+
+
+class CropEncoder:
+    """
+    Encodes crops with EncodingOptions on a shared thread pool and counts
+    what it wrote. Safe to use from several threads.
+    """
+    def __init__(self, options: EncodingOptions, threads: Optional[int] = None) -> None:
+        cfg = load_settings().get("export_encoding") or {}
+        self.options = options
+        self.threads = max(1, int(threads or cfg.get("threads", min(4, os.cpu_count() or 1))))
+        self.stats: dict[str, EncodeStats] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def save_many(self, items: Sequence[tuple[Image.Image, Path]]) -> None:
+        """Encode (crop, path) pairs, concurrently when there are several."""
+        if len(items) > 1 and self.threads > 1:
+            for _ in self._executor().map(lambda item: self._save(*item), items):
+                pass
+        else:
+            for patch, path in items:
+                self._save(patch, path)
+
+    def take_stats(self) -> dict[str, EncodeStats]:
+        """Return the stats gathered so far and reset them."""
+        with self._lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="encode")
+            return self._pool
+
+    def _save(self, patch: Image.Image, path: Path) -> None:
+        start = time.perf_counter()
+        self.options.save(patch, path)
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(path)
+        with self._lock:
+            stats = self.stats.setdefault(self.options.format, EncodeStats())
+            stats.files += 1
+            stats.bytes += size
+            stats.seconds += seconds
+
+
+_encoders: dict[EncodingOptions, CropEncoder] = {}
+_encoders_lock = threading.Lock()
+
+
+def shared_encoder(options: EncodingOptions) -> CropEncoder:
+    """The process-wide encoder for `options` (one thread pool per process)."""
+    with _encoders_lock:
+        enc = _encoders.get(options)
+        if enc is None:
+            enc = _encoders[options] = CropEncoder(options)
+        return enc
@@ -0,0 +1,217 @@
+# src/artifacts_annotator/controllers/crop_shards.py
+"""
+Packed crop output: a few large shard files instead of one file per crop.
+
+Layout of a shard export folder:
+  shard-00000.bin      crops as raw uint8 RGB (height x width x 3, row-major),
+                       concatenated
+  shard-00000.idx.npy  one INDEX_DTYPE record per crop: byte offset and shape
+                       in the .bin, source image, annotation/crop index, bbox
+                       and artifact type
+  shards.json          list of shards plus the source-path and artifact-type
+                       tables the index records refer to
+
+ShardReader memory-maps the .bin files, so crops are returned as zero-copy
+numpy views. Qt-free; the trainer only needs numpy.
+"""
+
+import glob
+import json
+import os
+import shutil
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from artifacts_annotator.config import load_settings
+
+SHARDS_NAME = "shards.json"
+# Folder inside the export folder where a new export is written until close()
+STAGING_NAME = ".shards.tmp"
+SHARDS_VERSION = 1
+
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("height", "<u4"),
+    ("width", "<u4"),
+    ("source", "<u4"),         # position in shards.json "sources"
+    ("annotation", "<u4"),
+    ("crop", "<u4"),
+    ("bbox", "<i4", (4,)),     # left, top, right, bottom in the source image
+    ("artifact_type", "<i4"),  # position in shards.json "artifact_types", -1 if none
+])
+
+# (annotation index, crop index, bbox, artifact_type, HxWx3 uint8 pixels)
+CropRecord = tuple[int, int, tuple[int, int, int, int], Optional[str], np.ndarray]
+
+
+def default_shard_bytes(settings_path: str = "settings.yaml") -> int:
+    """Target shard size from the 'shard_size_mb' setting (default 1 GiB)."""
+    return int(float(load_settings(settings_path).get("shard_size_mb", 1024)) * (1 << 20))
+
+
+class ShardWriter:
+    """
+    Appends crops to shard files, starting a new shard once the current one
+    reaches `shard_bytes`. Not thread-safe: one writer per export.
+
+    Shards are written to a staging folder; close() replaces the previous
+    export in the folder with them, abort() discards them.
+    """
+    def __init__(self, output_dir: str, shard_bytes: Optional[int] = None) -> None:
+        self.output_dir = output_dir
+        self.shard_bytes = shard_bytes or default_shard_bytes()
+        self._staging = os.path.join(output_dir, STAGING_NAME)
+        shutil.rmtree(self._staging, ignore_errors=True)
+        os.makedirs(self._staging)
+        self._sources: dict[str, int] = {}
+        self._types: dict[str, int] = {}
+        self._shards: list[dict] = []
+        self._file = None
+        self._records: list[tuple] = []
+        self._offset = 0
+        self.count = 0
+
+    def add(self, image_path: str, crops: Iterable[CropRecord]) -> None:
+        """Append the crops of one image."""
+        source = self._sources.setdefault(image_path, len(self._sources))
+        for ann_idx, crop_idx, bbox, artifact_type, pixels in crops:
+            if self._file is None:
+                self._open_shard()
+            pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+            h, w = pixels.shape[:2]
+            type_id = -1
+            if artifact_type is not None:
+                type_id = self._types.setdefault(artifact_type, len(self._types))
+            self._records.append(
+                (self._offset, h, w, source, ann_idx, crop_idx, bbox, type_id)
+            )
+            self._file.write(pixels.data)
+            self._offset += pixels.nbytes
+            self.count += 1
+            if self._offset >= self.shard_bytes:
+                self._close_shard()
+
+    def close(self) -> None:
+        """Finish the last shard, write shards.json and swap in the new export."""
+        self._close_shard()
+        meta = {
+            "version": SHARDS_VERSION,
+            "channels": 3,
+            "sources": list(self._sources),
+            "artifact_types": list(self._types),
+            "shards": self._shards,
+        }
+        with open(os.path.join(self._staging, SHARDS_NAME), "w") as f:
+            json.dump(meta, f, indent=2)
+        # shards.json goes first and comes back last, so it never lists
+        # shards of the other export.
+        old_meta = os.path.join(self.output_dir, SHARDS_NAME)
+        if os.path.exists(old_meta):
+            os.remove(old_meta)
+        for path in glob.glob(os.path.join(self.output_dir, "shard-*")):
+            os.remove(path)
+        for name in sorted(os.listdir(self._staging)):
+            if name != SHARDS_NAME:
+                os.replace(os.path.join(self._staging, name),
+                           os.path.join(self.output_dir, name))
+        os.replace(os.path.join(self._staging, SHARDS_NAME), old_meta)
+        os.rmdir(self._staging)
+
+    def abort(self) -> None:
+        """Discard the shards written so far; the previous export is kept."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        shutil.rmtree(self._staging, ignore_errors=True)
+
+    def _open_shard(self) -> None:
+        name = f"shard-{len(self._shards):05d}"
+        self._file = open(os.path.join(self._staging, name + ".bin"), "wb")
+        self._records = []
+        self._offset = 0
+
+    def _close_shard(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        name = os.path.splitext(os.path.basename(self._file.name))[0]
+        np.save(os.path.join(self._staging, name + ".idx.npy"),
+                np.array(self._records, dtype=INDEX_DTYPE))
+        self._shards.append({
+            "data": name + ".bin",
+            "index": name + ".idx.npy",
+            "count": len(self._records),
+            "bytes": self._offset,
+        })
+        self._file = None
+
+
+class ShardReader:
+    """
+    Random access to the crops of a shard export.
+
+    `reader[i]` is a read-only HxWx3 uint8 view into the memory-mapped shard;
+    nothing is copied until the caller does so.
+    """
+    def __init__(self, output_dir: str) -> None:
+        with open(os.path.join(output_dir, SHARDS_NAME)) as f:
+            meta = json.load(f)
+        if meta.get("version") != SHARDS_VERSION:
+            raise ValueError(f"unsupported shard version: {meta.get('version')!r}")
+        self.sources: list[str] = meta["sources"]
+        self.artifact_types: list[str] = meta["artifact_types"]
+        self.channels = int(meta.get("channels", 3))
+        self._data = [
+            np.memmap(os.path.join(output_dir, s["data"]), dtype=np.uint8, mode="r")
+            for s in meta["shards"]
+        ]
+        self._index = [np.load(os.path.join(output_dir, s["index"])) for s in meta["shards"]]
+        self._starts = np.cumsum([0] + [len(ix) for ix in self._index])
+
+    def __len__(self) -> int:
+        return int(self._starts[-1])
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        shard, rec = self._locate(i)
+        return self._pixels(shard, rec)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for shard, index in enumerate(self._index):
+            for rec in index:
+                yield self._pixels(shard, rec)
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._index)
+
+    def shard_index(self, shard: int) -> np.ndarray:
+        """The INDEX_DTYPE records of one shard."""
+        return self._index[shard]
+
+    def record(self, i: int) -> dict:
+        """Metadata of crop i: source, annotation/crop index, bbox, artifact_type."""
+        _, rec = self._locate(i)
+        type_id = int(rec["artifact_type"])
+        return {
+            "source": self.sources[int(rec["source"])],
+            "annotation_index": int(rec["annotation"]),
+            "crop_index": int(rec["crop"]),
+            "bbox": [int(v) for v in rec["bbox"]],
+            "artifact_type": self.artifact_types[type_id] if type_id >= 0 else None,
+        }
+
+    def _locate(self, i: int) -> tuple[int, np.void]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        shard = int(np.searchsorted(self._starts, i, side="right")) - 1
+        return shard, self._index[shard][i - self._starts[shard]]
+
+    def _pixels(self, shard: int, rec: np.void) -> np.ndarray:
+        h, w = int(rec["height"]), int(rec["width"])
+        start = int(rec["offset"])
+        return self._data[shard][start:start + h * w * self.channels].reshape(
+            h, w, self.channels
+        )
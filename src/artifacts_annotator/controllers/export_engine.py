@@ -0,0 +1,597 @@
+# src/artifacts_annotator/controllers/export_engine.py
+"""
+Headless batch export of annotation crops.
+
+This module must not import PyQt5: it is used both by the GUI (driven from a
+background thread) and by command-line exports on machines without a display.
+"""
+
+import os
+import threading
+from concurrent.futures import (
+    Executor, Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+)
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+from PIL import Image
+
+from artifacts_annotator.controllers.annotation_manager import AnnotationManager
+from artifacts_annotator.controllers.crop_encoder import (
+    EncodeStats, EncodingOptions, merge_stats, shared_encoder
+)
+from artifacts_annotator.controllers.crop_shards import CropRecord, ShardWriter
+from artifacts_annotator.controllers.virtual_export import CropManifestWriter
+from artifacts_annotator.controllers.folder_index import FolderIndex
+from artifacts_annotator.controllers.export_pipeline import (
+    ExportPipeline, export_pipeline_enabled
+)
+from artifacts_annotator.controllers.export_manifest import (
+    ExportManifest, fingerprint_settings, image_fingerprint, relative_outputs
+)
+from artifacts_annotator.controllers.output_writer import (
+    CropBox, crop_boxes, cut_crops, decode_crop_region, export_format,
+    export_subfolders_enabled, iter_crops, write_crop_files, write_crops_and_metadata
+)
+from artifacts_annotator.generators.crop_cache import export_crop_cache
+from artifacts_annotator.generators.crop_generator import (
+    AnnotationCropGenerator, SharedMasks
+)
+
+OUTPUT_FORMATS = ("files", "shards", "virtual")
+
+# (window_size, min_fraction) of one configuration of a multi-configuration export
+ExportConfig = tuple[tuple[int, int], float]
+
+# progress(done, total, image_path)
+ProgressCallback = Callable[[int, int, str], None]
+
+
+@dataclass
+class ExportSummary:
+    """Outcome of an export run."""
+    total: int = 0
+    exported: int = 0
+    skipped: int = 0
+    failed: list[tuple[str, str]] = field(default_factory=list)
+    cancelled: bool = False
+    # per-stage throughput lines of a pipelined run
+    stages: list[str] = field(default_factory=list)
+    # crop files written, by encoding format
+    encoded: dict[str, EncodeStats] = field(default_factory=dict)
+    # set when the run as a whole failed (see ExportThread)
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> int:
+        return self.exported + self.skipped + len(self.failed)
+
+
+def export_image(
+    image_path: str,
+    output_dir: str,
+    annotations: list[dict],
+    window_size: tuple[int, int],
+    min_fraction: float,
+    image_ext: str,
+    image_size: Optional[tuple[int, int]] = None,
+    encoding: Optional[EncodingOptions] = None
+) -> list[str]:
+    """
+    Export crops and metadata for a single image.
+
+    Module-level so it can be pickled and run inside a worker process.
+
+    Args:
+        image_path: Path to the source image.
+        output_dir: Directory where crops and metadata are written.
+        annotations: Annotations of the image.
+        window_size: Size of the crop window.
+        min_fraction: Minimum fraction of mask coverage per sub-crop.
+        image_ext: Extension for saved crop files.
+        image_size: Known (width, height) of the image; when given, the
+            image is only opened if there are crops to write.
+        encoding: How crops are encoded (overrides image_ext); defaults to
+            the 'export_encoding' settings for image_ext.
+
+    Returns:
+        Written files, relative to output_dir.
+    """
+    encoder = shared_encoder(encoding) if encoding is not None else None
+    if image_size is not None:
+        gen = AnnotationCropGenerator(
+            annotations,
+            image_size=image_size,
+            window_size=window_size,
+            min_fraction=min_fraction,
+            cache=export_crop_cache()
+        )
+        written = write_crops_and_metadata(
+            Path(image_path), gen, Path(output_dir), image_ext=image_ext, encoder=encoder
+        )
+        return relative_outputs(written, output_dir)
+    # Image.open only reads the header; the same handle is then used to
+    # decode just the region the crops need.
+    with Image.open(image_path) as img:
+        gen = AnnotationCropGenerator(
+            annotations,
+            image_size=img.size,
+            window_size=window_size,
+            min_fraction=min_fraction,
+            cache=export_crop_cache()
+        )
+        written = write_crops_and_metadata(
+            Path(image_path), gen, Path(output_dir), image_ext=image_ext, image=img,
+            encoder=encoder
+        )
+    return relative_outputs(written, output_dir)
+
+
+def _export_image_task(
+    image_path: str,
+    output_dir: str,
+    annotations: list[dict],
+    window_size: tuple[int, int],
+    min_fraction: float,
+    encoding: EncodingOptions,
+    image_size: Optional[tuple[int, int]]
+) -> tuple[list[str], dict[str, EncodeStats]]:
+    """Worker: export_image plus the encode statistics of this image."""
+    encoder = shared_encoder(encoding)
+    encoder.take_stats()
+    outputs = export_image(
+        image_path, output_dir, annotations, window_size, min_fraction,
+        encoding.ext, image_size, encoding
+    )
+    return outputs, encoder.take_stats()
+
+
+def config_dirname(config: ExportConfig) -> str:
+    """Output subfolder of one configuration, e.g. "w128x128_f0.5"."""
+    (w, h), min_fraction = config
+    return f"w{w}x{h}_f{min_fraction:g}"
+
+
+def export_image_configs(
+    image_path: str,
+    output_dir: str,
+    annotations: list[dict],
+    configs: Sequence[ExportConfig],
+    encoding: EncodingOptions,
+    image_size: Optional[tuple[int, int]] = None
+) -> tuple[list[str], dict[str, EncodeStats]]:
+    """
+    Export one image under several configurations.
+
+    Annotation masks are shared between configurations (see SharedMasks)
+    and the region covering every configuration's crops is decoded once;
+    configuration c is written to output_dir/config_dirname(c).
+
+    Returns:
+        Written files relative to output_dir, and the encode statistics.
+    """
+    encoder = shared_encoder(encoding)
+    encoder.take_stats()
+    with Image.open(image_path) as img:
+        size = image_size or img.size
+        margin = (max(w for (w, _), _ in configs), max(h for (_, h), _ in configs))
+        masks = SharedMasks(size, margin)
+        boxes = [
+            crop_boxes(AnnotationCropGenerator(
+                annotations, image_size=size, window_size=window_size,
+                min_fraction=min_fraction, shared_masks=masks,
+                cache=export_crop_cache()
+            ))
+            for window_size, min_fraction in configs
+        ]
+        decoded = decode_crop_region(Path(image_path), [b for bs in boxes for b in bs], img)
+    written = []
+    for config, config_boxes in zip(configs, boxes):
+        crops = cut_crops(*decoded, config_boxes) if decoded is not None else []
+        written += write_crop_files(
+            Path(image_path), crops, Path(output_dir) / config_dirname(config),
+            encoder=encoder
+        )
+    return relative_outputs(written, output_dir), encoder.take_stats()
+
+
+def export_image_crops(
+    image_path: str,
+    annotations: list[dict],
+    window_size: tuple[int, int],
+    min_fraction: float,
+    image_size: Optional[tuple[int, int]] = None
+) -> list[CropRecord]:
+    """
+    Compute the crops of a single image and return their pixels.
+
+    Used for shard exports: workers only produce pixels, the parent process
+    appends them to the shards.
+
+    Returns:
+        (annotation index, crop index, bbox, artifact_type, HxWx3 uint8 array)
+        for every crop.
+    """
+    if image_size is not None:
+        return _crop_records(image_path, annotations, window_size, min_fraction, image_size)
+    with Image.open(image_path) as img:
+        return _crop_records(image_path, annotations, window_size, min_fraction, img.size, img)
+
+
+def _crop_records(
+    image_path: str,
+    annotations: list[dict],
+    window_size: tuple[int, int],
+    min_fraction: float,
+    image_size: tuple[int, int],
+    image: Optional[Image.Image] = None
+) -> list[CropRecord]:
+    gen = AnnotationCropGenerator(
+        annotations,
+        image_size=image_size,
+        window_size=window_size,
+        min_fraction=min_fraction,
+        cache=export_crop_cache()
+    )
+    return [
+        (ann_idx, crop_idx, bbox, artifact_type, np.asarray(patch))
+        for ann_idx, crop_idx, bbox, artifact_type, patch
+        in iter_crops(Path(image_path), gen, image)
+    ]
+
+
+def export_image_boxes(
+    image_path: str,
+    annotations: list[dict],
+    window_size: tuple[int, int],
+    min_fraction: float,
+    image_size: Optional[tuple[int, int]] = None
+) -> list[CropBox]:
+    """
+    Compute the crop boxes of a single image without decoding any pixels.
+
+    Used for virtual exports; only the image header is read, and not even
+    that when `image_size` is known.
+
+    Returns:
+        (annotation index, crop index, bbox, artifact_type) for every crop.
+    """
+    if image_size is None:
+        with Image.open(image_path) as img:
+            image_size = img.size
+    gen = AnnotationCropGenerator(
+        annotations,
+        image_size=image_size,
+        window_size=window_size,
+        min_fraction=min_fraction,
+        cache=export_crop_cache()
+    )
+    return crop_boxes(gen)
+
+
+class ExportEngine:
+    """
+    Exports crops for a list of images on a process pool.
+
+    A manifest in the output folder records what each image was exported
+    from, so by default only images whose pixels, annotations or export
+    parameters changed are regenerated; outputs of images that disappeared
+    are deleted.
+
+    With `configs` every image is exported under several (window_size,
+    min_fraction) configurations in one pass, each into its own subfolder
+    (see export_image_configs); only per-crop files are supported then.
+
+    With output_format "shards" crops are packed into a few large shard
+    files (see crop_shards) instead of one file per crop; with "virtual"
+    only a crops.csv of crop boxes is written (see virtual_export). Both
+    are always rewritten in full, and only a run that completes without
+    failures replaces the previous export.
+
+    Progress is reported through a callback and a run can be stopped from any
+    thread with `cancel()`; images already being processed are finished, the
+    rest are skipped.
+    """
+    def __init__(
+        self,
+        output_dir: str,
+        annotation_folder: str = "",
+        window_size: tuple[int, int] = (128, 128),
+        min_fraction: float = 0.5,
+        image_ext: Optional[str] = None,
+        workers: Optional[int] = None,
+        incremental: bool = True,
+        index: Optional[FolderIndex] = None,
+        output_format: Optional[str] = None,
+        pipeline: Optional[bool] = None,
+        encoding: Optional[EncodingOptions] = None,
+        configs: Optional[Sequence[ExportConfig]] = None
+    ) -> None:
+        """
+        Args:
+            output_dir: Directory where crops and metadata are written.
+            annotation_folder: Dataset root handed to AnnotationManager.
+            window_size: Size of the crop window.
+            min_fraction: Minimum fraction of mask coverage per sub-crop.
+            image_ext: Extension for saved crop files; selects the encoding
+                format unless `encoding` is given.
+            workers: Number of worker processes (default: CPU count).
+                With 1 the export runs serially in the calling thread.
+            incremental: Skip images that are unchanged since the last
+                export into output_dir.
+            index: Folder index whose stored image dimensions spare the
+                workers from probing image headers.
+            output_format: "files" (one image file per crop plus a JSON
+                per image), "shards" or "virtual"; defaults to the
+                'export_format' setting.
+            pipeline: Export per-crop files through ExportPipeline, which
+                overlaps crop computation, decoding and writing; defaults
+                to the 'export_pipeline.enabled' setting.
+            encoding: How crop files are encoded; defaults to the
+                'export_encoding' settings.
+            configs: (window_size, min_fraction) configurations to export
+                in one pass; window_size and min_fraction are ignored then.
+        """
+        self.output_dir = output_dir
+        self.annotation_folder = annotation_folder
+        self.window_size = window_size
+        self.min_fraction = min_fraction
+        self.encoding = encoding or EncodingOptions.from_settings(extension=image_ext)
+        self.image_ext = self.encoding.ext
+        self.workers = workers or os.cpu_count() or 1
+        self.output_format = output_format or export_format()
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"unknown output format: {self.output_format!r}")
+        self.configs = [(tuple(w), float(f)) for w, f in configs] if configs else None
+        if self.configs and self.output_format != "files":
+            raise ValueError("multi-configuration exports write per-crop files only")
+        self.incremental = incremental and self.output_format == "files"
+        self.index = index
+        self.pipeline = export_pipeline_enabled() if pipeline is None else pipeline
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation of the running export (thread-safe)."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def run(
+        self,
+        files: Sequence[str],
+        progress: Optional[ProgressCallback] = None
+    ) -> ExportSummary:
+        """
+        Export all files and block until done or cancelled.
+
+        Args:
+            files: Image paths to export.
+            progress: Called as progress(done, total, path) after each image.
+
+        Returns:
+            ExportSummary with counts and per-file failures.
+        """
+        self._cancel.clear()
+        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        summary = ExportSummary(total=len(files))
+        manifest = ExportManifest.load(self.output_dir, self.annotation_folder)
+        sink = self._open_sink()
+        jobs = self._stale_jobs(files, manifest, summary, progress)
+        complete = False
+        try:
+            if self.workers <= 1:
+                self._run_serial(jobs, manifest, sink, summary, progress)
+            elif sink is None and self.pipeline and not self.configs:
+                self._run_pipeline(jobs, manifest, summary, progress)
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    self._run_pool(pool, jobs, manifest, sink, summary, progress)
+            if not self.cancelled and sink is None:
+                manifest.prune(set(files))
+            complete = not self.cancelled and not summary.failed
+        finally:
+            if sink is not None:
+                # Sinks are rewritten in full: only a complete run replaces
+                # the previous export.
+                if complete:
+                    sink.close()
+                else:
+                    sink.abort()
+            else:
+                manifest.save()
+        summary.cancelled = self.cancelled
+        return summary
+
+    def _stale_jobs(
+        self,
+        files: Sequence[str],
+        manifest: ExportManifest,
+        summary: ExportSummary,
+        progress: Optional[ProgressCallback]
+    ) -> Iterator[tuple[str, list[dict], dict, Optional[tuple[int, int]]]]:
+        """
+        Yield (path, annotations, fingerprint, image size or None) for images
+        that need exporting, counting the up-to-date ones as skipped.
+        """
+        ann_mgr = AnnotationManager(self.annotation_folder)
+        try:
+            yield from self._fingerprinted_jobs(ann_mgr, files, manifest, summary, progress)
+        finally:
+            ann_mgr.close()
+
+    def _fingerprinted_jobs(
+        self,
+        ann_mgr: AnnotationManager,
+        files: Sequence[str],
+        manifest: ExportManifest,
+        summary: ExportSummary,
+        progress: Optional[ProgressCallback]
+    ) -> Iterator[tuple[str, list[dict], dict, Optional[tuple[int, int]]]]:
+        settings = fingerprint_settings(
+            self.window_size, self.min_fraction, self.image_ext,
+            export_subfolders_enabled(), self.encoding.fingerprint(), self.configs
+        )
+        # Single-file stores are read once instead of once per image.
+        bulk = ann_mgr.load_all(files) if ann_mgr.store.bulk_load else None
+        for path in files:
+            if self.cancelled:
+                return
+            try:
+                if bulk is not None:
+                    annotations = bulk.get(path, [])
+                else:
+                    annotations = ann_mgr.load(path)
+                fingerprint = image_fingerprint(path, annotations, settings)
+            except Exception as exc:
+                summary.failed.append((path, repr(exc)))
+                self._report(summary, progress, path)
+                continue
+            if self.incremental and manifest.is_current(path, fingerprint):
+                summary.skipped += 1
+                self._report(summary, progress, path)
+                continue
+            size = None
+            if self.index is not None:
+                size = self.index.dimensions(path, *fingerprint["image"])
+            yield path, annotations, fingerprint, size
+
+    def _open_sink(self) -> Optional[Union[ShardWriter, CropManifestWriter]]:
+        """The writer collecting worker results, or None for per-image files."""
+        if self.output_format == "shards":
+            return ShardWriter(self.output_dir)
+        if self.output_format == "virtual":
+            return CropManifestWriter(self.output_dir)
+        return None
+
+    def _task(
+        self,
+        path: str,
+        annotations: list[dict],
+        size: Optional[tuple[int, int]]
+    ) -> tuple[Callable, tuple]:
+        """The worker function for the output format and its arguments."""
+        if self.output_format == "shards":
+            return export_image_crops, (
+                path, annotations, self.window_size, self.min_fraction, size
+            )
+        if self.output_format == "virtual":
+            return export_image_boxes, (
+                path, annotations, self.window_size, self.min_fraction, size
+            )
+        if self.configs:
+            return export_image_configs, (
+                path, self.output_dir, annotations, self.configs, self.encoding, size
+            )
+        return _export_image_task, (
+            path, self.output_dir, annotations,
+            self.window_size, self.min_fraction, self.encoding, size
+        )
+
+    @staticmethod
+    def _store(
+        path: str,
+        fingerprint: dict,
+        result,
+        manifest: ExportManifest,
+        sink: Optional[Union[ShardWriter, CropManifestWriter]],
+        summary: ExportSummary
+    ) -> None:
+        """Record a worker result: crops go to the sink, files to the manifest."""
+        if sink is not None:
+            sink.add(path, result)
+        else:
+            outputs, encoded = result
+            manifest.record(path, fingerprint, outputs)
+            merge_stats(summary.encoded, encoded)
+
+    @staticmethod
+    def _report(
+        summary: ExportSummary,
+        progress: Optional[ProgressCallback],
+        path: str
+    ) -> None:
+        if progress:
+            progress(summary.done, summary.total, path)
+
+    def _run_serial(
+        self,
+        jobs: Iterable[tuple[str, list[dict], dict, Optional[tuple[int, int]]]],
+        manifest: ExportManifest,
+        sink: Optional[Union[ShardWriter, CropManifestWriter]],
+        summary: ExportSummary,
+        progress: Optional[ProgressCallback]
+    ) -> None:
+        for path, annotations, fingerprint, size in jobs:
+            if self.cancelled:
+                break
+            try:
+                fn, args = self._task(path, annotations, size)
+                self._store(path, fingerprint, fn(*args), manifest, sink, summary)
+                summary.exported += 1
+            except Exception as exc:
+                summary.failed.append((path, repr(exc)))
+            self._report(summary, progress, path)
+
+    def _run_pipeline(
+        self,
+        jobs: Iterable[tuple[str, list[dict], dict, Optional[tuple[int, int]]]],
+        manifest: ExportManifest,
+        summary: ExportSummary,
+        progress: Optional[ProgressCallback]
+    ) -> None:
+        pipeline = ExportPipeline(
+            self.output_dir, self.window_size, self.min_fraction, self.encoding,
+            compute_workers=self.workers
+        )
+        staged = (
+            (path, annotations, size, fingerprint)
+            for path, annotations, fingerprint, size in jobs
+        )
+        for fingerprint, path, outputs, error in pipeline.run(staged, lambda: self.cancelled):
+            if error is None:
+                manifest.record(path, fingerprint, outputs)
+                summary.exported += 1
+            else:
+                summary.failed.append((path, error))
+            self._report(summary, progress, path)
+        summary.stages = pipeline.describe()
+        merge_stats(summary.encoded, pipeline.encoder.take_stats())
+
+    def _run_pool(
+        self,
+        pool: Executor,
+        jobs: Iterable[tuple[str, list[dict], dict, Optional[tuple[int, int]]]],
+        manifest: ExportManifest,
+        sink: Optional[Union[ShardWriter, CropManifestWriter]],
+        summary: ExportSummary,
+        progress: Optional[ProgressCallback]
+    ) -> None:
+        # Keep only a few tasks per worker in flight so cancellation takes
+        # effect quickly and huge file lists do not create huge queues.
+        max_in_flight = self.workers * 4
+        pending: dict[Future, tuple[str, dict]] = {}
+        jobs = iter(jobs)
+        while True:
+            while not self.cancelled and len(pending) < max_in_flight:
+                job = next(jobs, None)
+                if job is None:
+                    break
+                path, annotations, fingerprint, size = job
+                fn, args = self._task(path, annotations, size)
+                fut = pool.submit(fn, *args)
+                pending[fut] = (path, fingerprint)
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                path, fingerprint = pending.pop(fut)
+                try:
+                    self._store(path, fingerprint, fut.result(), manifest, sink, summary)
+                    summary.exported += 1
+                except Exception as exc:
+                    summary.failed.append((path, repr(exc)))
+                self._report(summary, progress, path)
@@ -0,0 +1,182 @@
+# src/artifacts_annotator/controllers/export_manifest.py
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+MANIFEST_NAME = ".export_manifest.json"
+MANIFEST_VERSION = 2
+
+
+def annotations_hash(annotations: list[dict]) -> str:
+    """Stable hash of an image's annotation list."""
+    blob = json.dumps(annotations, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def image_fingerprint(
+    image_path: str,
+    annotations: list[dict],
+    settings: dict
+) -> dict:
+    """
+    Describe everything an image's exported crops depend on.
+
+    Args:
+        image_path: Path to the source image.
+        annotations: Annotations of the image.
+        settings: Export parameters (window size, min fraction, ...).
+
+    Returns:
+        JSON-serializable fingerprint dict.
+    """
+    st = os.stat(image_path)
+    return {
+        "image": [st.st_size, st.st_mtime_ns],
+        "annotations": annotations_hash(annotations),
+        "settings": settings,
+    }
+
+
+class ExportManifest:
+    """
+    Records, per exported image, its fingerprint and the files written for it,
+    so re-exports only regenerate stale images and can delete orphaned crops.
+    Stored as JSON in the output folder.
+
+    Entries are keyed by the resolved image path relative to the dataset
+    root, so the same dataset reached through a different spelling of its
+    path (relative, absolute, symlinked) matches the same entries.
+    """
+    def __init__(self, output_dir: str, root: str = "") -> None:
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / MANIFEST_NAME
+        self.root = os.path.realpath(root) if root else None
+        self.entries: dict[str, dict] = {}
+        # outputs recorded during this run; never deleted by it
+        self._written: set[str] = set()
+
+    @classmethod
+    def load(cls, output_dir: str, root: str = "") -> "ExportManifest":
+        manifest = cls(output_dir, root)
+        try:
+            with manifest.path.open() as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                manifest.entries = data.get("images", {})
+            elif data.get("version") == 1:
+                # Version 1 keyed entries by the path as given.
+                manifest.entries = {
+                    manifest.key(p): e for p, e in data.get("images", {}).items()
+                }
+        except (OSError, ValueError, AttributeError):
+            pass
+        return manifest
+
+    def key(self, image_path: str) -> str:
+        """Entry key of an image: its real path, relative to the root if inside it."""
+        real = os.path.realpath(image_path)
+        if self.root is not None:
+            rel = os.path.relpath(real, self.root)
+            if rel != os.pardir and not rel.startswith(os.pardir + os.sep):
+                return Path(rel).as_posix()
+        return Path(real).as_posix()
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w") as f:
+            json.dump({"version": MANIFEST_VERSION, "images": self.entries}, f)
+        os.replace(tmp, self.path)
+
+    def is_current(self, image_path: str, fingerprint: dict) -> bool:
+        """
+        True if the image was exported with this fingerprint and its
+        metadata file is still present.
+        """
+        entry = self.entries.get(self.key(image_path))
+        if entry is None or entry.get("fingerprint") != fingerprint:
+            return False
+        outputs = entry.get("outputs") or []
+        # The metadata JSON is always written last; one stat is enough to
+        # notice an output folder that was cleaned by hand.
+        return bool(outputs) and (self.output_dir / outputs[-1]).exists()
+
+    def outputs(self, image_path: str) -> list[str]:
+        entry = self.entries.get(self.key(image_path))
+        return list(entry.get("outputs", [])) if entry else []
+
+    def record(self, image_path: str, fingerprint: dict, outputs: list[str]) -> None:
+        """
+        Store a fresh export of an image, deleting files from its previous
+        export that were not written again.
+        """
+        self._written.update(outputs)
+        self._delete(set(self.outputs(image_path)) - set(outputs))
+        self.entries[self.key(image_path)] = {"fingerprint": fingerprint, "outputs": outputs}
+
+    def forget(self, image_path: str) -> None:
+        """Delete all outputs of an image and drop its entry."""
+        self._forget_key(self.key(image_path))
+
+    def prune(self, keep: set[str]) -> list[str]:
+        """
+        Forget every image not in `keep` (image paths).
+
+        Returns:
+            The entry keys that were removed.
+        """
+        keep_keys = {self.key(p) for p in keep}
+        gone = [k for k in self.entries if k not in keep_keys]
+        for k in gone:
+            self._forget_key(k)
+        return gone
+
+    def _forget_key(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry:
+            self._delete(entry.get("outputs", []))
+
+    def _delete(self, rel_paths) -> None:
+        for rel in rel_paths:
+            if rel in self._written:
+                continue
+            try:
+                (self.output_dir / rel).unlink()
+            except FileNotFoundError:
+                pass
+
+
+def relative_outputs(paths: list[Path], output_dir: str) -> list[str]:
+    """Convert written file paths to output-folder-relative POSIX strings."""
+    base = Path(output_dir)
+    return [p.relative_to(base).as_posix() for p in paths]
+
+
+def fingerprint_settings(
+    window_size: tuple[int, int],
+    min_fraction: float,
+    image_ext: str,
+    export_subfolders: bool,
+    encoding: Optional[dict] = None,
+    configs: Optional[list] = None
+) -> dict:
+    """
+    Export parameters that affect the files written for an image.
+
+    A multi-configuration export passes its (window_size, min_fraction)
+    pairs as `configs`.
+    """
+    settings = {
+        "window_size": list(window_size),
+        "min_fraction": min_fraction,
+        "image_ext": image_ext,
+        "export_subfolders": export_subfolders,
+    }
+    if encoding is not None:
+        settings["encoding"] = encoding
+    if configs is not None:
+        settings["configs"] = [[list(w), f] for w, f in configs]
+    return settings
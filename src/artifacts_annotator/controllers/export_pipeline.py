@@ -0,0 +1,247 @@
+# src/artifacts_annotator/controllers/export_pipeline.py
+"""
+Staged crop export with overlapping stages (Qt-free).
+
+Each image passes through three stages, each with its own concurrency:
+  compute  crop boxes from the annotations (CPU bound; worker processes),
+  decode   the region covering the image's crops (I/O bound; threads),
+  write    cut and save the crops and metadata JSON (threads; the crops
+           of an image are encoded in parallel by a CropEncoder, and
+           Pillow releases the GIL while decoding and encoding).
+
+Stages are connected by bounded queues. When a later stage falls behind,
+the earlier ones block, so at most `queue_depth` images wait between two
+stages and memory stays flat. Boxes are computed before decoding so that
+only the region covering the crops is ever decoded.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from PIL import Image
+
+from artifacts_annotator.config import load_settings
+from artifacts_annotator.controllers.crop_encoder import CropEncoder, EncodingOptions
+from artifacts_annotator.controllers.export_manifest import relative_outputs
+from artifacts_annotator.controllers.output_writer import (
+    crop_boxes, cut_crops, decode_crop_region, write_crop_files
+)
+from artifacts_annotator.generators.crop_cache import export_crop_cache
+from artifacts_annotator.generators.crop_generator import AnnotationCropGenerator
+
+# (image path, annotations, known size or None, caller's tag)
+PipelineJob = tuple[str, list[dict], Optional[tuple[int, int]], object]
+# (caller's tag, image path, written files relative to output_dir or None, error or None)
+PipelineResult = tuple[object, str, Optional[list[str]], Optional[str]]
+
+
+@dataclass
+class StageStats:
+    """Work done by one pipeline stage."""
+    name: str
+    workers: int
+    items: int = 0
+    failed: int = 0
+    busy: float = 0.0  # seconds, summed over workers
+
+    def describe(self, wall: float) -> str:
+        """One-line summary: throughput and how busy the stage's workers were."""
+        rate = self.items / wall if wall > 0 else 0.0
+        util = self.busy / (wall * self.workers) if wall > 0 else 0.0
+        failed = f", {self.failed} failed" if self.failed else ""
+        return (f"{self.name}: {self.items} images{failed}, {rate:.1f}/s, "
+                f"{self.workers} workers {util:.0%} busy")
+
+
+def export_pipeline_enabled(settings_path: str = "settings.yaml") -> bool:
+    """Return the 'export_pipeline.enabled' flag (default True)."""
+    cfg = load_settings(settings_path).get("export_pipeline") or {}
+    return bool(cfg.get("enabled", True))
+
+
+def _compute_boxes(
+    image_path: str,
+    annotations: list[dict],
+    window_size: tuple[int, int],
+    min_fraction: float,
+    image_size: Optional[tuple[int, int]]
+) -> tuple[list, float]:
+    """Worker process: crop boxes of one image and the CPU time they took."""
+    start = time.monotonic()
+    if image_size is None:
+        with Image.open(image_path) as img:
+            image_size = img.size
+    gen = AnnotationCropGenerator(
+        annotations, image_size=image_size,
+        window_size=window_size, min_fraction=min_fraction,
+        cache=export_crop_cache()
+    )
+    return crop_boxes(gen), time.monotonic() - start
+
+
+class ExportPipeline:
+    """
+    Exports images as per-crop files through the compute/decode/write stages.
+
+    Produces exactly the files of export_image; `run` yields one result per
+    image in completion order.
+    """
+    def __init__(
+        self,
+        output_dir: str,
+        window_size: tuple[int, int],
+        min_fraction: float,
+        encoding: EncodingOptions,
+        compute_workers: Optional[int] = None,
+        decode_threads: Optional[int] = None,
+        write_threads: Optional[int] = None,
+        queue_depth: Optional[int] = None
+    ) -> None:
+        cfg = load_settings().get("export_pipeline") or {}
+        self.output_dir = output_dir
+        self.window_size = window_size
+        self.min_fraction = min_fraction
+        self.encoder = CropEncoder(encoding)
+        self.compute_workers = int(compute_workers or os.cpu_count() or 1)
+        self.decode_threads = int(decode_threads or cfg.get("decode_threads", 2))
+        self.write_threads = int(write_threads or cfg.get("write_threads", 4))
+        self.queue_depth = int(queue_depth or cfg.get("queue_depth", 8))
+        self.stats = [
+            StageStats("compute", self.compute_workers),
+            StageStats("decode", self.decode_threads),
+            StageStats("write", self.write_threads),
+        ]
+        self.wall = 0.0
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        jobs: Iterable[PipelineJob],
+        cancelled: Callable[[], bool] = lambda: False
+    ) -> Iterator[PipelineResult]:
+        """
+        Push jobs through the stages, yielding results as images finish.
+
+        Once `cancelled()` is true no new images are started; images already
+        in the pipeline are finished.
+        """
+        compute, decode, write = self.stats
+        decode_q: queue.Queue = queue.Queue(self.queue_depth)
+        write_q: queue.Queue = queue.Queue(self.queue_depth)
+        done_q: queue.Queue = queue.Queue()
+        decoders = self._start(self.decode_threads, self._decode_worker, decode_q, write_q, done_q)
+        writers = self._start(self.write_threads, self._write_worker, write_q, done_q)
+        pool = ProcessPoolExecutor(max_workers=self.compute_workers)
+        in_flight: dict[Future, tuple[str, object]] = {}
+        jobs = iter(jobs)
+        exhausted = False
+        start = time.monotonic()
+        try:
+            while True:
+                while not exhausted and not cancelled() and len(in_flight) < self.compute_workers * 2:
+                    job = next(jobs, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    path, annotations, size, tag = job
+                    fut = pool.submit(_compute_boxes, path, annotations,
+                                      self.window_size, self.min_fraction, size)
+                    in_flight[fut] = (path, tag)
+                yield from _drain(done_q)
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, timeout=0.05, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    path, tag = in_flight.pop(fut)
+                    try:
+                        boxes, busy = fut.result()
+                    except Exception as exc:
+                        self._count(compute, 0.0, failed=True)
+                        done_q.put((tag, path, None, repr(exc)))
+                        continue
+                    self._count(compute, busy)
+                    decode_q.put((path, tag, boxes))  # blocks while decoders are behind
+        finally:
+            for _ in decoders:
+                decode_q.put(None)
+            for t in decoders:
+                t.join()
+            for _ in writers:
+                write_q.put(None)
+            for t in writers:
+                t.join()
+            pool.shutdown(cancel_futures=True)
+            self.encoder.shutdown()
+            self.wall = time.monotonic() - start
+        yield from _drain(done_q)
+
+    def describe(self) -> list[str]:
+        """Per-stage summary lines of the last run."""
+        return [s.describe(self.wall) for s in self.stats]
+
+    def _start(self, count: int, target, *args) -> list[threading.Thread]:
+        threads = [
+            threading.Thread(target=target, args=args, daemon=True,
+                             name=f"export-{target.__name__.strip('_')}-{i}")
+            for i in range(count)
+        ]
+        for t in threads:
+            t.start()
+        return threads
+
+    def _count(self, stage: StageStats, busy: float, failed: bool = False) -> None:
+        with self._lock:
+            stage.busy += busy
+            if failed:
+                stage.failed += 1
+            else:
+                stage.items += 1
+
+    def _decode_worker(self, inq: queue.Queue, outq: queue.Queue, done_q: queue.Queue) -> None:
+        stage = self.stats[1]
+        while (item := inq.get()) is not None:
+            path, tag, boxes = item
+            start = time.monotonic()
+            try:
+                decoded = None
+                if boxes:
+                    with Image.open(path) as img:
+                        decoded = decode_crop_region(Path(path), boxes, img)
+            except Exception as exc:
+                self._count(stage, time.monotonic() - start, failed=True)
+                done_q.put((tag, path, None, repr(exc)))
+                continue
+            self._count(stage, time.monotonic() - start)
+            outq.put((path, tag, boxes, decoded))
+
+    def _write_worker(self, inq: queue.Queue, done_q: queue.Queue) -> None:
+        stage = self.stats[2]
+        while (item := inq.get()) is not None:
+            path, tag, boxes, decoded = item
+            start = time.monotonic()
+            try:
+                crops = cut_crops(*decoded, boxes) if decoded is not None else []
+                written = write_crop_files(
+                    Path(path), crops, Path(self.output_dir), encoder=self.encoder
+                )
+                outputs = relative_outputs(written, self.output_dir)
+            except Exception as exc:
+                self._count(stage, time.monotonic() - start, failed=True)
+                done_q.put((tag, path, None, repr(exc)))
+                continue
+            self._count(stage, time.monotonic() - start)
+            done_q.put((tag, path, outputs, None))
+
+
+def _drain(q: queue.Queue) -> Iterator:
+    while True:
+        try:
+            yield q.get_nowait()
+        except queue.Empty:
+            return
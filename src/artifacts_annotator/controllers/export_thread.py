@@ -0,0 +1,25 @@
+# src/artifacts_annotator/controllers/export_thread.py
+from typing import List
+from PyQt5.QtCore import QThread, pyqtSignal
+from .export_engine import ExportEngine, ExportSummary
+
+class ExportThread(QThread):
+    """Runs an ExportEngine off the GUI thread and reports through signals."""
+    progress = pyqtSignal(int, int, str)
+    completed = pyqtSignal(object)  # ExportSummary, always emitted
+
+    def __init__(self, engine: ExportEngine, files: List[str], parent=None) -> None:
+        super().__init__(parent)
+        self.engine = engine
+        self.files = list(files)
+
+    def cancel(self) -> None:
+        self.engine.cancel()
+
+    def run(self) -> None:
+        try:
+            summary = self.engine.run(self.files, progress=self.progress.emit)
+        except Exception as exc:
+            # e.g. an unusable output folder; the GUI must still be told.
+            summary = ExportSummary(total=len(self.files), error=repr(exc))
+        self.completed.emit(summary)
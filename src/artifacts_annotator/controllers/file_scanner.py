@@ -1,18 +1,168 @@
 # src/my_package_name/controllers/file_scanner.py
+import fnmatch
 import os
-from typing import List
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, List, Optional
+from ..config import load_settings
 
 class FileScanner:
-    """Scans a folder for supported image files."""
+    """
+    Scans a folder for supported image files.
+
+    Directories are listed with os.scandir on a thread pool, so deep or
+    slow (network) trees are walked concurrently. Optional include/exclude
+    glob patterns and a maximum depth come from the 'scan' section of
+    settings.yaml unless given explicitly. Patterns are matched against
+    both the entry name and its path relative to the scanned folder
+    (with '/' separators); excluded directories are not descended into.
+    """
     SUPPORTED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.tiff'}
 
-    def __init__(self, directory: str) -> None:
+    def __init__(
+        self,
+        directory: str,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        max_depth: Optional[int] = None,
+        threads: Optional[int] = None
+    ) -> None:
+        cfg = load_settings().get("scan") or {}
         self.directory = directory
+        self.include = list(cfg.get("include") or []) if include is None else list(include)
+        self.exclude = list(cfg.get("exclude") or []) if exclude is None else list(exclude)
+        self.max_depth = cfg.get("max_depth") if max_depth is None else max_depth
+        self.threads = int(threads or cfg.get("threads") or 8)
+        self._include = _compile(self.include)
+        self._exclude = _compile(self.exclude)
+
+    @classmethod
+    def is_supported(cls, path: str) -> bool:
+        return os.path.splitext(path)[1].lower() in cls.SUPPORTED_EXTENSIONS
+
+    def accepts(self, path: str) -> bool:
+        """Whether a file path inside the scanned folder passes all filters."""
+        if not self.is_supported(path):
+            return False
+        rel = os.path.relpath(path, self.directory).replace(os.sep, "/")
+        if rel.startswith("../"):
+            return False
+        if self.max_depth is not None and rel.count("/") > self.max_depth:
+            return False
+        parts = rel.split("/")
+        return not self._dir_excluded(parts[:-1]) and self._wanted(parts[-1], rel)
 
     def scan_files(self) -> List[str]:
         files: List[str] = []
-        for root, _, names in os.walk(self.directory):
-            for n in names:
-                if os.path.splitext(n)[1].lower() in self.SUPPORTED_EXTENSIONS:
-                    files.append(os.path.join(root, n))
+        for batch in self.iter_files():
+            files.extend(batch)
         return sorted(files)
+
+    def scan_subtree(self, directory: str) -> List[str]:
+        """Sorted files under a subdirectory, applying this scanner's filters."""
+        rel = os.path.relpath(directory, self.directory).replace(os.sep, "/")
+        if rel.startswith("../") or rel == "..":
+            return []
+        depth = 0 if rel == "." else rel.count("/") + 1
+        if self.max_depth is not None and depth > self.max_depth:
+            return []
+        if depth and self._dir_excluded(rel.split("/")):
+            return []
+        files: List[str] = []
+        for batch in self._walk(directory, depth, rel if depth else "", None):
+            files.extend(batch)
+        return sorted(files)
+
+    def iter_files(self, cancelled: Optional[threading.Event] = None) -> Iterator[List[str]]:
+        """
+        Yield batches of matching files as directories are listed.
+
+        Batches arrive in no particular order. Unreadable directories are
+        skipped. Stops early once `cancelled` is set.
+        """
+        return self._walk(self.directory, 0, "", cancelled)
+
+    def _walk(
+        self,
+        top: str,
+        depth: int,
+        rel: str,
+        cancelled: Optional[threading.Event]
+    ) -> Iterator[List[str]]:
+        with ThreadPoolExecutor(self.threads, thread_name_prefix="scan") as pool:
+            running = {pool.submit(self.list_dir, top, rel): depth}
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    level = running.pop(fut)
+                    files, subdirs = fut.result()
+                    if files:
+                        yield files
+                    if self.max_depth is not None and level >= self.max_depth:
+                        continue
+                    for path, sub_rel in subdirs:
+                        running[pool.submit(self.list_dir, path, sub_rel)] = level + 1
+                if cancelled is not None and cancelled.is_set():
+                    for fut in running:
+                        fut.cancel()
+                    return
+
+    def list_dir(self, path: str, rel: str) -> tuple[List[str], List[tuple[str, str]]]:
+        """
+        List one directory (non-recursively).
+
+        Args:
+            path: Directory to list.
+            rel: Its path relative to the scanned folder ('' for the folder).
+
+        Returns:
+            (matching files, [(subdirectory, relative path)] not excluded).
+        """
+        files: List[str] = []
+        subdirs: List[tuple[str, str]] = []
+        exts = self.SUPPORTED_EXTENSIONS
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    name = entry.name
+                    entry_rel = f"{rel}/{name}" if rel else name
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        # Like os.walk: symlinked directories are not followed.
+                        if not entry.is_symlink() and not self._excluded(name, entry_rel):
+                            subdirs.append((entry.path, entry_rel))
+                        continue
+                    dot = name.rfind(".")
+                    if dot > 0 and name[dot:].lower() in exts and self._wanted(name, entry_rel):
+                        files.append(entry.path)
+        except OSError:
+            pass
+        return files, subdirs
+
+    def _excluded(self, name: str, rel: str) -> bool:
+        return self._exclude is not None and bool(
+            self._exclude.match(name) or self._exclude.match(rel)
+        )
+
+    def _dir_excluded(self, parts: List[str]) -> bool:
+        """Whether any directory along a relative path is excluded."""
+        return any(
+            self._excluded(name, "/".join(parts[:i + 1])) for i, name in enumerate(parts)
+        )
+
+    def _wanted(self, name: str, rel: str) -> bool:
+        if self._excluded(name, rel):
+            return False
+        return self._include is None or bool(
+            self._include.match(name) or self._include.match(rel)
+        )
+
+def _compile(patterns: List[str]) -> Optional["re.Pattern[str]"]:
+    """Combine glob patterns into a single regex (None if there are none)."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns))
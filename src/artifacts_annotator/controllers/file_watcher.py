@@ -1,27 +1,244 @@
 # src/my_package_name/controllers/file_watcher.py
+import bisect
+import os
+import threading
+import time
+from dataclasses import dataclass, field
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from typing import Callable
+from typing import Callable, Optional
+from .file_scanner import FileScanner
+from ..config import load_settings
+
+ADDED, REMOVED, MODIFIED = "added", "removed", "modified"
+
+@dataclass
+class ChangeSet:
+    """
+    Image files and directories touched by filesystem events.
+
+    Each path maps to its latest operation, so repeated events for one path
+    collapse into a single entry. Non-image files (including annotation
+    sidecar .json files) are never recorded.
+    """
+    files: dict[str, str] = field(default_factory=dict)
+    dirs: dict[str, str] = field(default_factory=dict)
+    # image files below added directories, listed by scan_added_dirs
+    scanned: dict[str, list[str]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.files or self.dirs)
+
+    def note_file(self, path: str, op: str) -> None:
+        if not FileScanner.is_supported(path):
+            return
+        if op == MODIFIED and self.files.get(path) == ADDED:
+            return
+        self.files[path] = op
+
+    def note_dir(self, path: str, op: str) -> None:
+        self.dirs[path] = op
+
+    def merge(self, other: "ChangeSet") -> None:
+        """Fold a later change set into this one."""
+        for path, op in other.files.items():
+            self.note_file(path, op)
+        self.dirs.update(other.dirs)
+        for d in other.dirs:
+            self.scanned.pop(d, None)
+        self.scanned.update(other.scanned)
+
+    def scan_added_dirs(self, scanner: Optional[FileScanner] = None) -> None:
+        """
+        List the image files below added directories now, so that `apply`
+        (on the GUI thread) does not have to walk them.
+        """
+        for d, op in self.dirs.items():
+            if op == ADDED and d not in self.scanned and os.path.isdir(d):
+                self.scanned[d] = (scanner.scan_subtree(d) if scanner
+                                   else FileScanner(d).scan_files())
+
+    def apply(
+        self,
+        files: list[str],
+        scanner: Optional[FileScanner] = None
+    ) -> tuple[list[str], list[str], list[str]]:
+        """
+        Apply the changes to a sorted file list in place.
+
+        With a scanner, added directories are scanned and new files are
+        filtered using its include/exclude rules and depth limit. Directories
+        already listed by `scan_added_dirs` are not scanned again.
+
+        Directory removals are applied first, then added directories are
+        scanned, then individual files; every path is checked against the
+        filesystem so stale or duplicated events are harmless.
+
+        Returns:
+            (added, removed, modified) paths that actually changed `files`.
+        """
+        present = set(files)
+        added: set[str] = set()
+        removed: set[str] = set()
+        modified: set[str] = set()
+        for d, op in self.dirs.items():
+            if op == REMOVED and not os.path.isdir(d):
+                prefix = os.path.join(d, "")
+                removed.update(p for p in present if p.startswith(prefix))
+        for d, op in self.dirs.items():
+            if op == ADDED and d in self.scanned:
+                added.update(self.scanned[d])
+            elif op == ADDED and os.path.isdir(d):
+                scanned = scanner.scan_subtree(d) if scanner else FileScanner(d).scan_files()
+                added.update(scanned)
+        for p, op in self.files.items():
+            if os.path.isfile(p) and (scanner is None or scanner.accepts(p)):
+                added.add(p)
+                if op == MODIFIED:
+                    modified.add(p)
+            else:
+                removed.add(p)
+        removed &= present
+        removed -= added
+        modified = (modified | (added & present)) - removed
+        added -= present
+        if removed:
+            files[:] = [p for p in files if p not in removed]
+        if added:
+            if len(added) > 64:
+                files.extend(added)
+                files.sort()
+            else:
+                for p in added:
+                    bisect.insort(files, p)
+        return sorted(added), sorted(removed), sorted(modified & present)
 
 class FileWatcher:
-    """Watches a directory and fires a callback on changes."""
-    def __init__(self, directory: str, callback: Callable[[], None]) -> None:
+    """
+    Watches a directory and fires a callback with a ChangeSet on changes.
+
+    Events are coalesced: the callback runs once `debounce` seconds after
+    the last event, or at most `max_delay` seconds after the first one
+    during a continuous burst. It runs on the watcher's flush thread,
+    never on the caller's thread; added directories are scanned there
+    before the callback runs (see ChangeSet.scan_added_dirs).
+    """
+    def __init__(
+        self,
+        directory: str,
+        callback: Callable[[ChangeSet], None],
+        debounce: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        scanner: Optional[FileScanner] = None
+    ) -> None:
+        cfg = load_settings().get("watcher") or {}
+        if debounce is None:
+            debounce = float(cfg.get("debounce_ms", 300)) / 1000
+        if max_delay is None:
+            max_delay = float(cfg.get("max_delay_ms", 2000)) / 1000
         self.directory = directory
         self.callback = callback
+        self.debounce = debounce
+        self.max_delay = max(max_delay, debounce)
+        self.scanner = scanner
         self._observer = Observer()
+        self._cond = threading.Condition()
+        self._pending = ChangeSet()
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="watcher-flush", daemon=True
+        )
 
     def start(self) -> None:
-        handler = _WatchHandler(self.callback)
+        handler = _WatchHandler(self._on_changes)
         self._observer.schedule(handler, self.directory, recursive=True)
+        self._thread.start()
         self._observer.start()
 
     def stop(self) -> None:
+        """
+        Stop watching; changes not yet delivered are dropped. Does not wait
+        for a scan of added directories that is already running.
+        """
         self._observer.stop()
         self._observer.join()
+        with self._cond:
+            self._stopped = True
+            self._pending = ChangeSet()
+            self._cond.notify_all()
+
+    def _on_changes(self, changes: ChangeSet) -> None:
+        now = time.monotonic()
+        with self._cond:
+            self._pending.merge(changes)
+            if self._first is None:
+                self._first = now
+                self._cond.notify_all()
+            self._last = now
+
+    def _deadline(self) -> float:
+        return min(self._last + self.debounce, self._first + self.max_delay)
+
+    def _run(self) -> None:
+        """Flush thread: deliver pending changes once their deadline passes."""
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._first is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._deadline() - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    # Later events only move the deadline further out, so
+                    # waking up at the old one and re-checking is enough.
+                    self._cond.wait(remaining)
+                if self._stopped:
+                    return
+                changes, self._pending = self._pending, ChangeSet()
+                self._first = self._last = None
+            if changes:
+                changes.scan_added_dirs(self.scanner)
+                with self._cond:
+                    if self._stopped:
+                        return
+                self.callback(changes)
 
 class _WatchHandler(FileSystemEventHandler):
-    def __init__(self, callback: Callable[[], None]) -> None:
+    def __init__(self, callback: Callable[[ChangeSet], None]) -> None:
         super().__init__()
         self.callback = callback
+
     def on_any_event(self, event) -> None:
-        self.callback()
+        changes = event_changes(event)
+        if changes:
+            self.callback(changes)
+
+def event_changes(event) -> ChangeSet:
+    """Translate one watchdog event into a ChangeSet (empty if irrelevant)."""
+    changes = ChangeSet()
+    kind = event.event_type
+    src = os.fsdecode(event.src_path)
+    if event.is_directory:
+        # Directory "modified" events only mean its entries changed,
+        # which arrive as their own events.
+        if kind == "created":
+            changes.note_dir(src, ADDED)
+        elif kind == "deleted":
+            changes.note_dir(src, REMOVED)
+        elif kind == "moved":
+            changes.note_dir(src, REMOVED)
+            changes.note_dir(os.fsdecode(event.dest_path), ADDED)
+        return changes
+    if kind == "created":
+        changes.note_file(src, ADDED)
+    elif kind in ("modified", "closed"):
+        changes.note_file(src, MODIFIED)
+    elif kind == "deleted":
+        changes.note_file(src, REMOVED)
+    elif kind == "moved":
+        changes.note_file(src, REMOVED)
+        changes.note_file(os.fsdecode(event.dest_path), ADDED)
+    return changes
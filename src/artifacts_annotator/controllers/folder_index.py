@@ -0,0 +1,352 @@
+# src/artifacts_annotator/controllers/folder_index.py
+"""
+Persistent per-dataset index of image files.
+
+One SQLite file per dataset root (under the user cache directory) records
+every image's path, file size, mtime, pixel dimensions and whether it has an
+annotation sidecar, plus the mtime of every scanned directory. Re-opening a
+dataset lists the stored files immediately; `reconcile()` then only re-lists
+directories whose mtime changed.
+
+Qt-free: used by the GUI scan thread and by headless exports.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, Optional
+
+from PIL import Image
+
+from artifacts_annotator.config import load_settings, user_cache_dir
+from artifacts_annotator.controllers.annotation_store import sidecar_path
+from artifacts_annotator.controllers.file_scanner import FileScanner
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path      TEXT PRIMARY KEY,
+    dir       TEXT NOT NULL,
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    width     INTEGER,
+    height    INTEGER,
+    annotated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    path      TEXT PRIMARY KEY,
+    parent    TEXT,
+    mtime_ns  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# (size, mtime_ns, annotated) of one image
+FileInfo = tuple[int, int, bool]
+
+
+class FolderIndex:
+    """
+    Thread-safe SQLite index of the images below one dataset root.
+
+    The root is made absolute, so stored paths are absolute however the
+    root was spelled.
+    """
+    def __init__(self, root: str, db_path: Optional[str] = None) -> None:
+        self.root = os.path.abspath(root)
+        self.db_path = db_path or default_index_path(self.root)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._check_root()
+        self._conn.commit()
+
+    @classmethod
+    def from_settings(
+        cls,
+        root: str,
+        settings_path: str = "settings.yaml"
+    ) -> Optional["FolderIndex"]:
+        """
+        Open the index of `root` per the 'folder_index' section of the
+        settings file (keys: enabled, directory). Returns None if disabled
+        or if the database cannot be opened.
+        """
+        cfg = load_settings(settings_path).get("folder_index") or {}
+        if not cfg.get("enabled", True):
+            return None
+        directory = cfg.get("directory")
+        db_path = None
+        if directory:
+            directory = os.path.expanduser(directory)
+            os.makedirs(directory, exist_ok=True)
+            db_path = default_index_path(root, directory)
+        try:
+            return cls(root, db_path)
+        except sqlite3.Error:
+            return None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def files(self) -> list[str]:
+        """All indexed image paths, sorted."""
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM files ORDER BY path").fetchall()
+        return [r[0] for r in rows]
+
+    def is_annotated(self, path: str) -> bool:
+        """Whether the image had a JSON sidecar when its directory was listed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT annotated FROM files WHERE path=?", (path,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def dimensions(self, path: str, size: int, mtime_ns: int) -> Optional[tuple[int, int]]:
+        """
+        Stored (width, height) of an image, if known and the file still has
+        the given size and mtime.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, width, height FROM files WHERE path=?", (path,)
+            ).fetchone()
+        if row is None or row[2] is None or (row[0], row[1]) != (size, mtime_ns):
+            return None
+        return row[2], row[3]
+
+    def reconcile(
+        self,
+        scanner: FileScanner,
+        cancelled: Optional[threading.Event] = None
+    ) -> Iterator[tuple[list[str], list[str]]]:
+        """
+        Bring the index up to date with the filesystem.
+
+        Every known directory is stat'ed, but only new directories and those
+        whose mtime changed are listed. An empty index therefore amounts to a
+        full scan. Scanner filter changes invalidate the whole index.
+
+        Yields:
+            (added, removed) image paths per directory that changed.
+        """
+        self._check_rules(scanner)
+        with self._lock:
+            known = {
+                path: (parent, mtime)
+                for path, parent, mtime in self._conn.execute(
+                    "SELECT path, parent, mtime_ns FROM dirs"
+                )
+            }
+        children: dict[str, list[str]] = {}
+        for path, (parent, _) in known.items():
+            if parent is not None:
+                children.setdefault(parent, []).append(path)
+
+        with ThreadPoolExecutor(scanner.threads, thread_name_prefix="index") as pool:
+            running: dict = {}
+
+            def submit(path: str, rel: str, level: int) -> None:
+                stored = known.get(path, (None, None))[1]
+                fut = pool.submit(_check_dir, scanner, path, rel, stored)
+                running[fut] = (path, rel, level)
+
+            submit(self.root, "", 0)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    path, rel, level = running.pop(fut)
+                    mtime, listing = fut.result()
+                    parent = os.path.dirname(path) if path != self.root else None
+                    if mtime is None:
+                        removed = self._drop_dir(path)
+                        if removed:
+                            yield [], removed
+                        continue
+                    if listing is None:
+                        subdirs = [(d, _rel_join(rel, os.path.basename(d)))
+                                   for d in children.get(path, [])]
+                    else:
+                        files, subdirs = listing
+                        changes = self._store_dir(path, parent, mtime, files,
+                                                  [d for d, _ in subdirs],
+                                                  children.get(path, []))
+                        if changes[0] or changes[1]:
+                            yield changes
+                    if scanner.max_depth is not None and level >= scanner.max_depth:
+                        continue
+                    for sub, sub_rel in subdirs:
+                        submit(sub, sub_rel, level + 1)
+                if cancelled is not None and cancelled.is_set():
+                    for fut in running:
+                        fut.cancel()
+                    return
+
+    def probe_dimensions(self, cancelled: Optional[threading.Event] = None) -> int:
+        """
+        Read the pixel size of images whose dimensions are not stored yet
+        (image headers only). Returns the number of images updated.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM files WHERE width IS NULL"
+            ).fetchall()
+        updated = 0
+        batch = []
+        for (path,) in rows:
+            if cancelled is not None and cancelled.is_set():
+                break
+            try:
+                st = os.stat(path)
+                with Image.open(path) as img:
+                    batch.append((img.width, img.height, st.st_size, st.st_mtime_ns, path))
+            except Exception:
+                continue
+            if len(batch) >= 256:
+                updated += self._write_dimensions(batch)
+                batch = []
+        return updated + self._write_dimensions(batch)
+
+    def _write_dimensions(self, batch: list[tuple]) -> int:
+        if not batch:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE files SET width=?, height=?, size=?, mtime_ns=? WHERE path=?",
+                batch
+            )
+            self._conn.commit()
+        return len(batch)
+
+    def _check_root(self) -> None:
+        """Drop entries stored under another spelling of the root."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key='root'").fetchone()
+        if row is not None and row[0] == self.root:
+            return
+        self._conn.execute("DELETE FROM files")
+        self._conn.execute("DELETE FROM dirs")
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (self.root,))
+
+    def _check_rules(self, scanner: FileScanner) -> None:
+        rules = json.dumps([scanner.include, scanner.exclude, scanner.max_depth])
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key='rules'").fetchone()
+            if row is not None and row[0] == rules:
+                return
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("DELETE FROM dirs")
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('rules', ?)", (rules,))
+            self._conn.commit()
+
+    def _store_dir(
+        self,
+        path: str,
+        parent: Optional[str],
+        mtime: int,
+        files: dict[str, FileInfo],
+        subdirs: list[str],
+        old_subdirs: list[str]
+    ) -> tuple[list[str], list[str]]:
+        """Replace the stored contents of one re-listed directory."""
+        removed: list[str] = []
+        for gone in set(old_subdirs) - set(subdirs):
+            removed += self._drop_dir(gone)
+        with self._lock:
+            old = {
+                p: (size, m) for p, size, m in self._conn.execute(
+                    "SELECT path, size, mtime_ns FROM files WHERE dir=?", (path,)
+                )
+            }
+            gone_files = [p for p in old if p not in files]
+            self._conn.executemany("DELETE FROM files WHERE path=?", [(p,) for p in gone_files])
+            for p, (size, m, annotated) in files.items():
+                if old.get(p) == (size, m):
+                    self._conn.execute(
+                        "UPDATE files SET annotated=? WHERE path=?", (int(annotated), p)
+                    )
+                else:
+                    # New or rewritten: dimensions are probed again later.
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, NULL, NULL, ?)",
+                        (p, path, size, m, int(annotated))
+                    )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (path, parent, mtime)
+            )
+            self._conn.commit()
+        added = sorted(p for p in files if p not in old)
+        return added, sorted(removed + gone_files)
+
+    def _drop_dir(self, path: str) -> list[str]:
+        """Forget a directory and everything below it; returns removed files."""
+        prefix = os.path.join(path, "")
+        like = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            removed = [
+                r[0] for r in self._conn.execute(
+                    "SELECT path FROM files WHERE dir=? OR dir LIKE ? ESCAPE '\\'",
+                    (path, like)
+                )
+            ]
+            self._conn.execute(
+                "DELETE FROM files WHERE dir=? OR dir LIKE ? ESCAPE '\\'", (path, like)
+            )
+            self._conn.execute(
+                "DELETE FROM dirs WHERE path=? OR path LIKE ? ESCAPE '\\'", (path, like)
+            )
+            self._conn.commit()
+        return removed
+
+
+def default_index_path(root: str, directory: Optional[str] = None) -> str:
+    """Database file of a dataset root: <cache>/indexes/<sha1 of abs root>.sqlite."""
+    key = hashlib.sha1(os.path.abspath(root).encode("utf-8")).hexdigest()
+    return os.path.join(directory or user_cache_dir("indexes"), f"{key}.sqlite")
+
+
+def _rel_join(rel: str, name: str) -> str:
+    return f"{rel}/{name}" if rel else name
+
+
+def _check_dir(
+    scanner: FileScanner,
+    path: str,
+    rel: str,
+    stored_mtime: Optional[int]
+) -> tuple[Optional[int], Optional[tuple[dict[str, FileInfo], list[tuple[str, str]]]]]:
+    """
+    Worker: stat a directory and list it only if its mtime changed.
+
+    Returns (mtime, None) if unchanged, (None, None) if it is gone, and
+    (mtime, (files, subdirs)) after listing it.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, None
+    if mtime == stored_mtime:
+        return mtime, None
+    paths, subdirs = scanner.list_dir(path, rel)
+    files: dict[str, FileInfo] = {}
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        files[p] = (st.st_size, st.st_mtime_ns, os.path.exists(sidecar_path(p)))
+    return mtime, (files, subdirs)
@@ -0,0 +1,138 @@
+# src/artifacts_annotator/controllers/image_prefetcher.py
+"""
+Background decoding of the images around the one being viewed (Qt-free).
+
+While an image is shown, the next and previous files are opened on worker
+threads: their pyramid level for the current zoom is decoded and their
+annotations are read, so PageUp/PageDown can show them without touching the
+disk on the GUI thread.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from artifacts_annotator.config import load_settings
+from artifacts_annotator.controllers.annotation_manager import AnnotationManager
+from artifacts_annotator.controllers.annotation_save_queue import AnnotationSaveQueue
+from artifacts_annotator.generators.tile_source import TileSource
+
+
+@dataclass
+class PrefetchedImage:
+    """A decoded neighbour: its tile source (with a level in memory) and annotations."""
+    path: str
+    source: TileSource
+    annotations: list[dict]
+
+
+class ImagePrefetcher:
+    """
+    Keeps a bounded window of neighbouring images decoded ahead of time.
+
+    `ahead` images are prefetched in the direction of travel and `behind`
+    in the opposite one; entries that fall out of the window are dropped
+    (or cancelled if they have not started).
+    """
+    def __init__(
+        self,
+        ann_mgr: AnnotationManager,
+        save_queue: Optional[AnnotationSaveQueue] = None,
+        ahead: Optional[int] = None,
+        behind: Optional[int] = None,
+        workers: Optional[int] = None,
+        max_level_pixels: Optional[int] = None,
+        tile_size: Optional[int] = None
+    ) -> None:
+        cfg = load_settings().get("prefetch") or {}
+        viewer_cfg = load_settings().get("viewer") or {}
+        self.ann_mgr = ann_mgr
+        # Annotations still queued for writing win over the file on disk.
+        self.save_queue = save_queue
+        self.ahead = int(cfg.get("ahead", 3) if ahead is None else ahead)
+        self.behind = int(cfg.get("behind", 1) if behind is None else behind)
+        self.max_level_pixels = int(
+            float(cfg.get("max_level_mp", 64)) * 1e6
+            if max_level_pixels is None else max_level_pixels
+        )
+        self.tile_size = int(tile_size or viewer_cfg.get("tile_size", 512))
+        self._pool = ThreadPoolExecutor(
+            int(workers or cfg.get("workers", 2)), thread_name_prefix="prefetch"
+        )
+        self._lock = threading.Lock()
+        self._entries: dict[str, Future] = {}
+        self._last_index: Optional[int] = None
+        self._direction = 1
+
+    def update(self, files: Sequence[str], index: int, scale: float = 1.0) -> None:
+        """
+        Re-centre the window on files[index] and schedule missing neighbours,
+        nearest first.
+        """
+        if self._last_index is not None and index != self._last_index:
+            self._direction = 1 if index > self._last_index else -1
+        self._last_index = index
+        forward = [index + self._direction * k for k in range(1, self.ahead + 1)]
+        backward = [index - self._direction * k for k in range(1, self.behind + 1)]
+        # Interleave so the immediate neighbour on each side comes first.
+        order = [forward[0]] if forward else []
+        order += backward[:1] + forward[1:] + backward[1:]
+        wanted = [files[i] for i in order if 0 <= i < len(files) and i != index]
+        with self._lock:
+            for path in list(self._entries):
+                if path not in wanted:
+                    self._entries.pop(path).cancel()
+            for path in wanted:
+                if path not in self._entries:
+                    self._entries[path] = self._pool.submit(self._load, path, scale)
+
+    def take(self, path: str) -> Optional[PrefetchedImage]:
+        """
+        Remove and return the prefetched image for `path`.
+
+        Waits if it is being decoded right now (that is never slower than
+        starting over); returns None if it was not scheduled, had not
+        started yet, or failed.
+        """
+        with self._lock:
+            fut = self._entries.pop(path, None)
+        if fut is None or fut.cancel():
+            return None
+        try:
+            return fut.result()
+        except Exception:
+            return None
+
+    def invalidate(self, path: str) -> None:
+        """
+        Forget a prefetched image, e.g. after its annotations were submitted
+        for saving. A load that is already running is dropped too; loads
+        started later see the submitted annotations through the save queue.
+        """
+        with self._lock:
+            fut = self._entries.pop(path, None)
+        if fut is not None:
+            fut.cancel()
+
+    def clear(self) -> None:
+        with self._lock:
+            for fut in self._entries.values():
+                fut.cancel()
+            self._entries.clear()
+        self._last_index = None
+
+    def shutdown(self) -> None:
+        self.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _load(self, path: str, scale: float) -> PrefetchedImage:
+        source = TileSource(path, self.tile_size)
+        level = source.level_for_scale(scale)
+        w, h = source.level_size(level)
+        if w * h <= self.max_level_pixels:
+            source.level_image(level)
+        annotations = self.save_queue.pending(path) if self.save_queue else None
+        if annotations is None:
+            annotations = self.ann_mgr.load(path)
+        return PrefetchedImage(path, source, annotations)
@@ -0,0 +1,148 @@
+# src/artifacts_annotator/controllers/image_region.py
+"""
+Decode only part of an image.
+
+For uncompressed TIFFs (tiled or stripped) only the tiles/rows covering the
+requested box are read from disk; other formats fall back to a full decode
+followed by a crop.
+"""
+
+from typing import Iterable, Optional
+
+from PIL import Image
+
+Box = tuple[int, int, int, int]
+
+# Bytes per pixel for raw modes whose rows can be addressed directly.
+_RAW_BYTES_PER_PIXEL = {
+    "L": 1, "P": 1, "LA": 2, "I;16": 2, "I;16B": 2, "I;16L": 2,
+    "RGB": 3, "RGBA": 4, "RGBX": 4, "CMYK": 4, "I;32": 4, "F;32F": 4,
+}
+
+
+def crops_bounding_box(crops: Iterable[Box]) -> Optional[Box]:
+    """Return the smallest box containing all crops, or None if there are none."""
+    boxes = list(crops)
+    if not boxes:
+        return None
+    return (
+        int(min(b[0] for b in boxes)), int(min(b[1] for b in boxes)),
+        int(max(b[2] for b in boxes)), int(max(b[3] for b in boxes)),
+    )
+
+
+def read_region(
+    image: Image.Image,
+    box: Box,
+    image_offset: tuple[int, int] = (0, 0)
+) -> tuple[Image.Image, tuple[int, int]]:
+    """
+    Return pixels covering `box` (full-image coordinates).
+
+    If `image` is a not-yet-loaded TIFF handle from Image.open, only the
+    tiles or strips intersecting the box are decoded and the handle itself
+    is turned into that region, so it must not be used as the full image
+    afterwards. Otherwise the image is loaded and cropped.
+
+    Args:
+        image: Source image or an already decoded region of it.
+        box: (left, top, right, bottom) in full-image coordinates.
+        image_offset: Position of `image` within the full image.
+
+    Returns:
+        region: Image containing at least the part of `box` inside the image.
+        offset: (left, top) of the region in full-image coordinates.
+    """
+    ox, oy = image_offset
+    w, h = image.size
+    left, top = max(box[0], ox), max(box[1], oy)
+    right, bottom = min(box[2], ox + w), min(box[3], oy + h)
+    if right <= left or bottom <= top:
+        return image.crop((box[0] - ox, box[1] - oy, box[2] - ox, box[3] - oy)), box[:2]
+
+    local = (left - ox, top - oy, right - ox, bottom - oy)
+    if image_offset == (0, 0):
+        origin = _load_partial(image, local)
+        if origin is not None:
+            return image, origin
+    if local == (0, 0, w, h):
+        return image, (ox, oy)
+    return image.crop(local), (left, top)
+
+
+def supports_partial_decode(image: Image.Image) -> bool:
+    """Whether read_region can decode parts of this unloaded image handle."""
+    tiles = getattr(image, "tile", None)
+    return not (
+        image.format != "TIFF"
+        or not tiles
+        or getattr(image, "use_load_libtiff", False)
+        or any(t[0] not in ("raw", "packbits") for t in tiles)
+    )
+
+
+def _load_partial(image: Image.Image, box: Box) -> Optional[tuple[int, int]]:
+    """
+    Restrict an unloaded TIFF handle to the tiles covering `box` and load it.
+
+    Returns:
+        Top-left corner of the loaded region (box rounded out to the tile
+        grid), or None if the format does not allow partial decoding.
+    """
+    if not supports_partial_decode(image):
+        return None
+
+    tiles = image.tile
+    if len(tiles) == 1:
+        tile = _raw_rows(tiles[0], image.size, box)
+        if tile is None:
+            return None
+        selected = [tile]
+    else:
+        selected = [t for t in tiles if _intersects(t[1], box)]
+        if not selected:
+            return None
+    rx0 = min(t[1][0] for t in selected)
+    ry0 = min(t[1][1] for t in selected)
+    rx1 = max(t[1][2] for t in selected)
+    ry1 = max(t[1][3] for t in selected)
+    image.tile = [
+        _with_extents(t, (t[1][0] - rx0, t[1][1] - ry0, t[1][2] - rx0, t[1][3] - ry0))
+        for t in selected
+    ]
+    image._size = (rx1 - rx0, ry1 - ry0)
+    image.load()
+    return rx0, ry0
+
+
+def _raw_rows(tile, size: tuple[int, int], box: Box):
+    """Narrow a single full-frame raw tile to the rows covering `box`."""
+    codec, extents, offset, args = tile[:4]
+    if codec != "raw" or extents != (0, 0) + tuple(size):
+        return None
+    rawmode = args[0] if isinstance(args, tuple) else args
+    stride = args[1] if isinstance(args, tuple) and len(args) > 1 else 0
+    ystep = args[2] if isinstance(args, tuple) and len(args) > 2 else 1
+    bpp = _RAW_BYTES_PER_PIXEL.get(rawmode)
+    if bpp is None or ystep != 1:
+        return None
+    row_bytes = stride or bpp * size[0]
+    y0, y1 = box[1], box[3]
+    tile = _with_extents(tile, (0, y0, size[0], y1))
+    return _with_offset(tile, offset + y0 * row_bytes)
+
+
+def _intersects(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _with_extents(tile, extents: Box):
+    if hasattr(tile, "_replace"):
+        return tile._replace(extents=extents)
+    return (tile[0], extents) + tuple(tile[2:])
+
+
+def _with_offset(tile, offset: int):
+    if hasattr(tile, "_replace"):
+        return tile._replace(offset=offset)
+    return (tile[0], tile[1], offset) + tuple(tile[3:])
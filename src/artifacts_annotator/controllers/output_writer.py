@@ -1,51 +1,171 @@
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 import json
-import yaml
 from PIL import Image
+from artifacts_annotator.config import load_settings
+from artifacts_annotator.controllers.crop_encoder import (
+    CropEncoder, EncodingOptions, shared_encoder
+)
+from artifacts_annotator.controllers.image_region import crops_bounding_box, read_region
 from artifacts_annotator.generators.crop_generator import AnnotationCropGenerator
 
+# (annotation index, crop index, bbox, artifact_type)
+CropBox = tuple[int, int, tuple[int, int, int, int], Optional[str]]
+# (annotation index, crop index, bbox, artifact_type, RGB crop)
+Crop = tuple[int, int, tuple[int, int, int, int], Optional[str], Image.Image]
+
+def export_subfolders_enabled(settings_path: str = "settings.yaml") -> bool:
+    """Return the 'export_subfolders' flag from the settings file."""
+    return bool(load_settings(settings_path).get("export_subfolders", False))
+
+def export_format(settings_path: str = "settings.yaml") -> str:
+    """Return the 'export_format' setting: "files" (default), "shards" or "virtual"."""
+    return str(load_settings(settings_path).get("export_format", "files"))
+
+def crop_boxes(generator: AnnotationCropGenerator) -> list[CropBox]:
+    """
+    Compute the crop boxes of all annotations of a generator.
+
+    Returns:
+        (annotation index, crop index, bbox, artifact_type) for every crop.
+    """
+    return [
+        (ann_idx, crop_idx, (int(l), int(t), int(r), int(b)),
+         generator.annotations[ann_idx].get("artifact_type"))
+        for ann_idx, (_, _, crops) in enumerate(generator.process_each())
+        for crop_idx, (l, t, r, b) in enumerate(crops)
+    ]
+
+def decode_crop_region(
+    image_path: Path,
+    boxes: list[CropBox],
+    image: Optional[Image.Image] = None
+) -> Optional[tuple[Image.Image, tuple[int, int]]]:
+    """
+    Decode the RGB region covering all crop boxes.
+
+    Only that region is decoded (tile/strip-wise where the format allows
+    it), and nothing is decoded if there are no boxes.
+
+    Args:
+        image_path: Path to the source image.
+        boxes: Crop boxes as returned by crop_boxes.
+        image: Already-open source image; see write_crops_and_metadata.
+
+    Returns:
+        (region, (left, top) of the region), or None without boxes.
+    """
+    bbox = crops_bounding_box(box for _, _, box, _ in boxes)
+    if bbox is None:
+        return None
+    src = image if image is not None else Image.open(image_path)
+    region, offset = read_region(src, bbox)
+    return region.convert("RGB"), offset
+
+def cut_crops(
+    region: Image.Image,
+    offset: tuple[int, int],
+    boxes: Iterable[CropBox]
+) -> Iterator[Crop]:
+    """Yield (annotation index, crop index, bbox, artifact_type, crop image)."""
+    ox, oy = offset
+    for ann_idx, crop_idx, (l, t, r, b), artifact_type in boxes:
+        patch = region.crop((l - ox, t - oy, r - ox, b - oy))
+        yield ann_idx, crop_idx, (l, t, r, b), artifact_type, patch
+
+def iter_crops(
+    image_path: Path,
+    generator: AnnotationCropGenerator,
+    image: Optional[Image.Image] = None
+) -> Iterator[Crop]:
+    """
+    Compute the crops of an image and yield their RGB pixels.
+
+    Only the region covering all crops is decoded (see decode_crop_region).
+
+    Args:
+        image_path: Path to the source image.
+        generator: A pre-initialized AnnotationCropGenerator instance.
+        image: Already-open source image; see write_crops_and_metadata.
+
+    Yields:
+        (annotation index, crop index, bbox, artifact_type, crop image).
+    """
+    boxes = crop_boxes(generator)
+    decoded = decode_crop_region(image_path, boxes, image)
+    if decoded is not None:
+        yield from cut_crops(*decoded, boxes)
+
 def write_crops_and_metadata(
     image_path: Path,
     generator: AnnotationCropGenerator,
     output_dir: Path,
-    image_ext: str = ".png"
-) -> None:
+    image_ext: str = ".png",
+    image: Optional[Image.Image] = None,
+    encoder: Optional[CropEncoder] = None
+) -> list[Path]:
     """
     Save crops and metadata for an image using a precomputed AnnotationCropGenerator.
 
     Reads 'export_subfolders' flag from 'settings.yaml' to determine
     whether to place crops in subfolders per artifact type.
 
+    Crops are produced by iter_crops, so only the region they cover is decoded.
+
     Args:
         image_path: Path to the source image.
         generator: A pre-initialized AnnotationCropGenerator instance.
         output_dir: Directory where crop files and metadata will be saved.
         image_ext: Extension for saved crop files (e.g., ".png").
+        image: Already-open source image, e.g. the lazy handle used to read
+            the image size. It is consumed: after the call it may hold only
+            the decoded region. Opened from image_path if omitted.
+        encoder: Encoder of the crop files; by default the process-wide one
+            for image_ext with the 'export_encoding' settings.
+
+    Returns:
+        Paths of all files written (crops and the metadata JSON).
+    """
+    return write_crop_files(
+        image_path, iter_crops(image_path, generator, image), output_dir, image_ext, encoder
+    )
+
+def write_crop_files(
+    image_path: Path,
+    crops: Iterable[Crop],
+    output_dir: Path,
+    image_ext: str = ".png",
+    encoder: Optional[CropEncoder] = None
+) -> list[Path]:
+    """
+    Save already cut crops of an image and its metadata JSON.
+
+    Args:
+        image_path: Path to the source image (names the outputs).
+        crops: (annotation index, crop index, bbox, artifact_type, crop image).
+        output_dir: Directory where crop files and metadata will be saved.
+        image_ext: Extension for saved crop files (e.g., ".png"); ignored
+            when an encoder is given.
+        encoder: Encoder of the crop files; see write_crops_and_metadata.
+
+    Returns:
+        Paths of all files written (crops and the metadata JSON).
     """
     # Load export configuration
-    export_subfolders = False
-    config_path = Path("settings.yaml")
-    if config_path.exists():
-        try:
-            cfg = yaml.safe_load(config_path.open()) or {}
-            export_subfolders = bool(cfg.get("export_subfolders", False))
-        except Exception:
-            export_subfolders = False
-
-    # Load and prepare image
-    img = Image.open(image_path).convert("RGB")
+    export_subfolders = export_subfolders_enabled()
+    if encoder is None:
+        encoder = shared_encoder(EncodingOptions.from_settings(extension=image_ext))
+    image_ext = encoder.options.ext
 
     # Ensure base output directory exists
     output_dir.mkdir(parents=True, exist_ok=True)
 
     stem = image_path.stem
     metadata: list[dict] = []
+    written: list[Path] = []
+    pending: list[tuple[Image.Image, Path]] = []
 
-    # Iterate through each annotation
-    for ann_idx, (mask, offset, crops) in enumerate(generator):
-        # Retrieve annotation type if present
-        ann_dict = generator.annotations[ann_idx]
-        artifact_type = ann_dict.get("artifact_type")
+    for ann_idx, crop_idx, bbox, artifact_type, patch in crops:
         # Determine output subdirectory
         subdir = output_dir
         rel_prefix = ""
@@ -55,22 +175,27 @@ def write_crops_and_metadata(
             subdir.mkdir(parents=True, exist_ok=True)
             rel_prefix = f"{safe_name}/"
 
-        # Save each crop and record metadata
-        for crop_idx, (l, t, r, b) in enumerate(crops):
-            patch = img.crop((l, t, r, b))
-            fname = f"{stem}_ann{ann_idx}_crop{crop_idx}{image_ext}"
-            out_path = subdir / fname
-            patch.save(out_path)
-
-            metadata.append({
-                "annotation_index": ann_idx,
-                "crop_index": crop_idx,
-                "bbox": [int(l), int(t), int(r), int(b)],
-                "file": rel_prefix + fname,
-                "artifact_type": artifact_type
-            })
+        # Queue the crop for encoding and record metadata
+        fname = f"{stem}_ann{ann_idx}_crop{crop_idx}{image_ext}"
+        out_path = subdir / fname
+        pending.append((patch, out_path))
+        written.append(out_path)
+
+        metadata.append({
+            "annotation_index": ann_idx,
+            "crop_index": crop_idx,
+            "bbox": list(bbox),
+            "file": rel_prefix + fname,
+            "artifact_type": artifact_type
+        })
+
+    # Encode all crops of the image at once, in parallel
+    encoder.save_many(pending)
 
     # Write metadata JSON
     json_path = output_dir / f"{stem}.json"
     with json_path.open("w") as jf:
         json.dump(metadata, jf, indent=2)
+    written.append(json_path)
+    return written
+
@@ -0,0 +1,87 @@
+# src/artifacts_annotator/controllers/scan_thread.py
+import threading
+import time
+from typing import List, Optional
+from PyQt5.QtCore import QThread, pyqtSignal
+from .file_scanner import FileScanner
+from .folder_index import FolderIndex
+
+class ScanThread(QThread):
+    """
+    Runs a FileScanner off the GUI thread.
+
+    Found files are emitted in `found(list)` batches at most every
+    `interval` seconds so the grid can fill while the scan is running;
+    `completed(list)` carries the full sorted result unless cancelled.
+
+    With a FolderIndex the index is reconciled instead of walking the whole
+    tree: only changes relative to the indexed files are reported (through
+    `found` and `lost`), and image dimensions are probed afterwards: the
+    thread keeps using the index after `completed` until QThread.finished.
+    """
+    found = pyqtSignal(object)      # List[str], unsorted
+    lost = pyqtSignal(object)       # List[str], removed since the index was saved
+    completed = pyqtSignal(object)  # List[str], sorted
+
+    def __init__(
+        self,
+        scanner: FileScanner,
+        index: Optional[FolderIndex] = None,
+        interval: float = 0.1,
+        parent=None
+    ) -> None:
+        super().__init__(parent)
+        self.scanner = scanner
+        self.index = index
+        self.interval = interval
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def run(self) -> None:
+        if self.index is not None:
+            self._reconcile()
+        else:
+            self._scan()
+
+    def _reconcile(self) -> None:
+        added: List[str] = []
+        removed: List[str] = []
+        last = time.monotonic()
+        for new, gone in self.index.reconcile(self.scanner, self._cancelled):
+            added += new
+            removed += gone
+            now = time.monotonic()
+            if now - last >= self.interval:
+                self._emit_changes(added, removed)
+                added, removed, last = [], [], now
+        if self._cancelled.is_set():
+            return
+        self._emit_changes(added, removed)
+        self.completed.emit(self.index.files())
+        self.index.probe_dimensions(self._cancelled)
+
+    def _emit_changes(self, added: List[str], removed: List[str]) -> None:
+        if removed:
+            self.lost.emit(removed)
+        if added:
+            self.found.emit(added)
+
+    def _scan(self) -> None:
+        files: List[str] = []
+        pending: List[str] = []
+        last = time.monotonic()
+        for batch in self.scanner.iter_files(self._cancelled):
+            pending.extend(batch)
+            now = time.monotonic()
+            if now - last >= self.interval:
+                files.extend(pending)
+                self.found.emit(pending)
+                pending, last = [], now
+        if self._cancelled.is_set():
+            return
+        if pending:
+            files.extend(pending)
+            self.found.emit(pending)
+        self.completed.emit(sorted(files))
@@ -0,0 +1,159 @@
+# src/artifacts_annotator/controllers/virtual_export.py
+"""
+Reference-only ("virtual") export: crop boxes instead of crop pixels.
+
+The export writes one `crops.csv` with a row per crop:
+
+  source, annotation_index, crop_index, left, top, right, bottom, artifact_type
+
+`source` is the absolute path of the image. Nothing is decoded at export
+time. VirtualCropReader serves the crops on demand from the source images
+(Qt-free).
+"""
+
+import csv
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import numpy as np
+from PIL import Image
+
+from artifacts_annotator.controllers.image_region import read_region, supports_partial_decode
+from artifacts_annotator.controllers.output_writer import CropBox
+
+CROPS_NAME = "crops.csv"
+FIELDS = [
+    "source", "annotation_index", "crop_index",
+    "left", "top", "right", "bottom", "artifact_type",
+]
+
+
+class CropManifestWriter:
+    """Writes crops.csv; not thread-safe, one writer per export."""
+    def __init__(self, output_dir: str) -> None:
+        os.makedirs(output_dir, exist_ok=True)
+        self.path = os.path.join(output_dir, CROPS_NAME)
+        self._tmp = self.path + ".tmp"
+        self._file = open(self._tmp, "w", newline="")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(FIELDS)
+        self.count = 0
+
+    def add(self, image_path: str, crops: Iterable[CropBox]) -> None:
+        """Append the crop boxes of one image."""
+        source = os.path.abspath(image_path)
+        for ann_idx, crop_idx, (l, t, r, b), artifact_type in crops:
+            self._csv.writerow([source, ann_idx, crop_idx, l, t, r, b, artifact_type or ""])
+            self.count += 1
+
+    def close(self) -> None:
+        """Finish the file; it replaces the previous crops.csv only now."""
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        """Discard what was written, keeping the previous crops.csv."""
+        self._file.close()
+        try:
+            os.remove(self._tmp)
+        except FileNotFoundError:
+            pass
+
+
+class VirtualCropReader:
+    """
+    Random access to the crops listed in a crops.csv.
+
+    `reader[i]` decodes crop i as an HxWx3 uint8 array. Decoded source
+    images are kept in an LRU bounded by `cache_bytes`, so consecutive crops
+    of the same image decode it once. Tiled or uncompressed TIFFs are not
+    cached: only the region of each crop is read from them.
+
+    Safe to use from several threads (e.g. data-loader workers).
+    """
+    def __init__(self, path: str, cache_bytes: int = 512 << 20) -> None:
+        """
+        Args:
+            path: crops.csv or the export folder containing it.
+            cache_bytes: Budget of the decoded-image cache.
+        """
+        if os.path.isdir(path):
+            path = os.path.join(path, CROPS_NAME)
+        self.cache_bytes = cache_bytes
+        sources: dict[str, int] = {}
+        types: dict[str, int] = {}
+        rows = []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                src = sources.setdefault(row["source"], len(sources))
+                art = row["artifact_type"]
+                rows.append((
+                    src, int(row["annotation_index"]), int(row["crop_index"]),
+                    int(row["left"]), int(row["top"]), int(row["right"]), int(row["bottom"]),
+                    types.setdefault(art, len(types)) if art else -1,
+                ))
+        self.sources: list[str] = list(sources)
+        self.artifact_types: list[str] = list(types)
+        self._rows = np.array(rows, dtype=np.int64).reshape(-1, 8)
+        self._cache: OrderedDict[str, Image.Image] = OrderedDict()
+        self._cache_size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        src, _, _, l, t, r, b, _ = (int(v) for v in self._rows[i])
+        return np.asarray(self.read(self.sources[src], (l, t, r, b)))
+
+    def record(self, i: int) -> dict:
+        """Metadata of crop i: source, annotation/crop index, bbox, artifact_type."""
+        src, ann, crop, l, t, r, b, art = (int(v) for v in self._rows[i])
+        return {
+            "source": self.sources[src],
+            "annotation_index": ann,
+            "crop_index": crop,
+            "bbox": [l, t, r, b],
+            "artifact_type": self.artifact_types[art] if art >= 0 else None,
+        }
+
+    def indices_of_type(self, artifact_type: Optional[str]) -> np.ndarray:
+        """Positions of the crops of one artifact type."""
+        if artifact_type is None:
+            art = -1
+        elif artifact_type in self.artifact_types:
+            art = self.artifact_types.index(artifact_type)
+        else:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self._rows[:, 7] == art)
+
+    def read(self, source: str, box: tuple[int, int, int, int]) -> Image.Image:
+        """Decode `box` of a source image as RGB."""
+        with self._lock:
+            img = self._cache.get(source)
+            if img is not None:
+                self._cache.move_to_end(source)
+        if img is not None:
+            return img.crop(box)
+        with Image.open(source) as handle:
+            if supports_partial_decode(handle):
+                region, (ox, oy) = read_region(handle, box)
+                return region.convert("RGB").crop(
+                    (box[0] - ox, box[1] - oy, box[2] - ox, box[3] - oy)
+                )
+            img = handle.convert("RGB")
+        self._put(source, img)
+        return img.crop(box)
+
+    def _put(self, source: str, img: Image.Image) -> None:
+        nbytes = img.width * img.height * 3
+        with self._lock:
+            if source in self._cache:
+                return
+            self._cache[source] = img
+            self._cache_size += nbytes
+            while self._cache_size > self.cache_bytes and len(self._cache) > 1:
+                _, old = self._cache.popitem(last=False)
+                self._cache_size -= old.width * old.height * 3
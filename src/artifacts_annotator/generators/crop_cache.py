@@ -0,0 +1,240 @@
+# src/artifacts_annotator/generators/crop_cache.py
+"""
+Memoization of per-annotation crop results.
+
+Results are keyed by a hash of the annotation geometry and the generator
+parameters, kept in a bounded in-memory LRU and optionally persisted to disk
+so repeated exports and previews skip mask rasterization and labeling.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from artifacts_annotator.config import load_settings
+
+CropResult = tuple[np.ndarray, tuple[int, int], list[tuple[int, int, int, int]]]
+
+
+def crop_cache_key(
+    annotation: dict,
+    image_size: tuple[int, int],
+    window_size: tuple[int, int],
+    min_fraction: float
+) -> str:
+    """Hash of everything a crop result depends on."""
+    blob = json.dumps(
+        [annotation.get("type"), annotation["points"],
+         list(image_size), list(window_size), min_fraction],
+        separators=(",", ":")
+    )
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class CropCache:
+    """
+    Thread-safe LRU cache of (mask, offset, crops) results.
+
+    Bounded by entry count and by total mask bytes; entries are evicted
+    least-recently-used first. With a directory, results are also stored as
+    .npz files there and reloaded on memory misses; the directory is trimmed
+    oldest-first to max_disk_bytes.
+    """
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 256 << 20,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = 2 << 30
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = Path(directory).expanduser() if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[CropResult, int]] = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def clear(self) -> None:
+        """Drop all in-memory entries (the disk store is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get(self, key: str) -> Optional[CropResult]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy_result(item[0])
+        result = self._load(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, result)
+        return _copy_result(result)
+
+    def put(self, key: str, result: CropResult) -> None:
+        mask, offset, crops = result
+        mask = mask.view()
+        mask.flags.writeable = False
+        stored = (
+            mask,
+            (int(offset[0]), int(offset[1])),
+            [tuple(int(v) for v in c) for c in crops],
+        )
+        self._remember(key, stored)
+        self._store(key, stored)
+
+    def _remember(self, key: str, result: CropResult) -> None:
+        size = result[0].nbytes + 64 * len(result[2]) + 256
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.npz"
+
+    def _load(self, key: str) -> Optional[CropResult]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                shape = tuple(data["shape"])
+                bits = np.unpackbits(data["mask"], count=int(np.prod(shape)))
+                mask = bits.reshape(shape).astype(bool)
+                offset = tuple(int(v) for v in data["offset"])
+                crops = [tuple(int(v) for v in c) for c in data["crops"]]
+        except (OSError, KeyError, ValueError):
+            return None
+        os.utime(path)  # keeps disk trimming least-recently-used
+        mask.flags.writeable = False
+        return mask, offset, crops
+
+    def _store(self, key: str, result: CropResult) -> None:
+        if self.directory is None:
+            return
+        mask, offset, crops = result
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with tmp.open("wb") as f:
+                np.savez(
+                    f,
+                    shape=np.array(mask.shape, dtype=np.int64),
+                    mask=np.packbits(mask),
+                    offset=np.array(offset, dtype=np.int64),
+                    crops=np.array(crops, dtype=np.int64).reshape(-1, 4),
+                )
+            os.replace(tmp, path)
+            self._trim_disk(path.stat().st_size)
+        except OSError:
+            pass
+
+    def _trim_disk(self, added: int) -> None:
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(p.stat().st_size for p in self._disk_files())
+            else:
+                self._disk_bytes += added
+            if self._disk_bytes <= self.max_disk_bytes:
+                return
+            files = sorted(self._disk_files(), key=lambda p: p.stat().st_mtime)
+            target = int(self.max_disk_bytes * 0.9)
+            for p in files:
+                if self._disk_bytes <= target:
+                    break
+                try:
+                    size = p.stat().st_size
+                    p.unlink()
+                    self._disk_bytes -= size
+                except OSError:
+                    pass
+
+    def _disk_files(self) -> list[Path]:
+        return list(self.directory.glob("*/*.npz"))
+
+
+def _copy_result(result: CropResult) -> CropResult:
+    """Share the read-only mask but hand out a fresh crop list."""
+    mask, offset, crops = result
+    return mask, offset, list(crops)
+
+
+_default_cache: Optional[CropCache] = None
+_default_lock = threading.Lock()
+
+
+def load_crop_cache(settings_path: str = "settings.yaml") -> Optional[CropCache]:
+    """
+    Build a CropCache from the 'crop_cache' section of the settings file.
+
+    Recognised keys: enabled (default true), max_entries, max_mb,
+    directory (enables the on-disk store) and max_disk_mb.
+    """
+    cfg = load_settings(settings_path).get("crop_cache") or {}
+    if not cfg.get("enabled", True):
+        return None
+    return CropCache(
+        max_entries=int(cfg.get("max_entries", 4096)),
+        max_bytes=int(float(cfg.get("max_mb", 256)) * (1 << 20)),
+        directory=cfg.get("directory"),
+        max_disk_bytes=int(float(cfg.get("max_disk_mb", 2048)) * (1 << 20)),
+    )
+
+
+def default_crop_cache() -> Optional[CropCache]:
+    """Process-wide cache configured from settings.yaml (None if disabled)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            # Not `or`: an empty CropCache is falsy (it has __len__).
+            cache = load_crop_cache()
+            _default_cache = cache if cache is not None else CropCache(max_entries=0)
+        return _default_cache if _default_cache.max_entries > 0 else None
+
+
+def export_crop_cache() -> Optional[CropCache]:
+    """
+    The cache for export generators: the process-wide cache, but only when
+    it persists results on disk. A single export computes every annotation
+    once, so an in-memory-only cache would never hit and only cost memory
+    in each worker.
+    """
+    cache = default_crop_cache()
+    return cache if cache is not None and cache.directory is not None else None
@@ -1,6 +1,8 @@
+from typing import Optional
 import numpy as np
 from PIL import Image, ImageDraw
-from scipy.ndimage import label
+from scipy.ndimage import label, find_objects
+from .crop_cache import CropCache, crop_cache_key
 
 class AnnotationCropGenerator:
     """
@@ -12,7 +14,10 @@ class AnnotationCropGenerator:
         annotations: list[dict],
         image_size: tuple[int, int],
         window_size: tuple[int, int] = (128, 128),
-        min_fraction: float = 0.5
+        min_fraction: float = 0.5,
+        max_workspace_pixels: int = 1 << 24,
+        cache: Optional[CropCache] = None,
+        shared_masks: Optional["SharedMasks"] = None
     ):
         """
         Initialize the generator.
@@ -22,11 +27,22 @@ class AnnotationCropGenerator:
             image_size: (width, height) of the full image.
             window_size: Size (width, height) of the crop window.
             min_fraction: Minimum fraction of mask coverage per sub-crop.
+            max_workspace_pixels: Upper bound on the integral-image scratch
+                buffer; larger masks are processed in row bands.
+            cache: Cache of per-annotation results, e.g. default_crop_cache()
+                or export_crop_cache(); None computes every result.
+            shared_masks: Masks rasterized once for several generators of
+                the same image (see SharedMasks); each annotation is
+                rasterized here otherwise.
         """
         self.annotations = annotations
         self.image_size = image_size
         self.window_size = window_size
         self.min_fraction = min_fraction
+        self.max_workspace_pixels = max_workspace_pixels
+        self._workspace: np.ndarray | None = None
+        self.cache = cache
+        self.shared_masks = shared_masks
 
     def __len__(self) -> int:
         """
@@ -50,14 +66,58 @@ class AnnotationCropGenerator:
             crops: List of global crop boxes (left, top, right, bottom).
         """
         ann = self.annotations[idx]
-        return self._process_annotation(ann)
+        return self._cached_result(ann)
 
     def __iter__(self):
         """
         Iterate over annotations, yielding (mask, offset, crops) for each.
         """
         for ann in self.annotations:
-            yield self._process_annotation(ann)
+            yield self._cached_result(ann)
+
+    def process_each(
+        self
+    ) -> list[tuple[np.ndarray, tuple[int, int], list[tuple[int,int,int,int]]]]:
+        """
+        Process every annotation, computing identical geometries once.
+
+        Annotations are processed one after another, each with its own
+        rasterization, integral-image and labelling pass over its local
+        mask; overlapping annotations are not merged. The passes reuse one
+        workspace buffer instead of allocating per annotation. Annotations
+        with identical geometry ('type' and 'points', e.g. the same region
+        labelled with several artifact types) are computed once.
+
+        Returns:
+            One (mask, offset, crops) tuple per annotation, in order.
+        """
+        computed: dict[tuple, tuple] = {}
+        results = []
+        for ann in self.annotations:
+            key = (ann.get("type"), tuple(tuple(p) for p in ann["points"]))
+            if key not in computed:
+                computed[key] = self._cached_result(ann)
+            results.append(computed[key])
+        return results
+
+    def _cached_result(
+        self,
+        annotation: dict
+    ) -> tuple[np.ndarray, tuple[int, int], list[tuple[int,int,int,int]]]:
+        """
+        Return the processed annotation from the cache, computing it on a miss.
+        Cached masks are read-only.
+        """
+        if self.cache is None:
+            return self._process_annotation(annotation)
+        key = crop_cache_key(
+            annotation, self.image_size, self.window_size, self.min_fraction
+        )
+        result = self.cache.get(key)
+        if result is None:
+            result = self._process_annotation(annotation)
+            self.cache.put(key, result)
+        return result
 
     def _process_annotation(
         self,
@@ -96,38 +156,9 @@ class AnnotationCropGenerator:
             mask: Local boolean mask array.
             offset: (left, top) top-left of mask in global coords.
         """
-        img_w, img_h = self.image_size
-        pts = annotation["points"]
-        if annotation.get("type") == "rect":
-            (x0, y0), (x1, y1) = pts
-        else:
-            xs, ys = zip(*pts)
-            x0, x1 = min(xs), max(xs)
-            y0, y1 = min(ys), max(ys)
-        x0_i, y0_i = int(np.floor(x0)), int(np.floor(y0))
-        x1_i, y1_i = int(np.ceil(x1)), int(np.ceil(y1))
-        w_m, h_m = self.window_size
-        left = max(0, x0_i - w_m)
-        top = max(0, y0_i - h_m)
-        right = min(img_w, x1_i + w_m)
-        bottom = min(img_h, y1_i + h_m)
-        w_loc, h_loc = right - left, bottom - top
-
-        mask_img = Image.new("L", (w_loc, h_loc), 0)
-        draw = ImageDraw.Draw(mask_img)
-        if annotation.get("type") == "rect":
-            rx0, ry0 = x0_i - left, y0_i - top
-            rx1, ry1 = x1_i - left, y1_i - top
-            draw.rectangle([rx0, ry0, rx1, ry1], fill=1)
-        else:
-            local_pts = [
-                (int(round(x)) - left, int(round(y)) - top)
-                for x, y in pts
-            ]
-            draw.polygon(local_pts, fill=1)
-
-        mask = np.array(mask_img, dtype=bool)
-        return mask, (left, top)
+        if self.shared_masks is not None:
+            return self.shared_masks.mask(annotation, self.window_size)
+        return rasterize_annotation(annotation, self.image_size, self.window_size)
 
     def _compute_local_crops(
         self,
@@ -149,16 +180,6 @@ class AnnotationCropGenerator:
         total = mask.sum()
         min_count = self.min_fraction * (h * w)
 
-        m = mask.astype(np.uint32)
-        ii = np.pad(m, ((1,0),(1,0)), constant_values=0).cumsum(axis=0).cumsum(axis=1)
-        sums = (
-            ii[h:,   w:]
-          - ii[:-h,  w:]
-          - ii[h:,  :-w]
-          + ii[:-h, :-w]
-        )
-        safe = sums >= min_count
-
         if total < min_count:
             ys, xs = np.nonzero(mask)
             yc = (ys.min() + ys.max()) // 2
@@ -167,13 +188,193 @@ class AnnotationCropGenerator:
             left = int(np.clip(xc - w//2, 0, W - w))
             return [(left, top, left+w, top+h)]
 
-        lm, num = label(safe)
+        safe = self._safe_map(mask, min_count)
+        # Label only the bounding box of the safe positions; raster order and
+        # therefore label order are unchanged.
+        rows = np.flatnonzero(safe.any(axis=1))
+        if rows.size == 0:
+            return []
+        cols = np.flatnonzero(safe.any(axis=0))
+        r0, c0 = int(rows[0]), int(cols[0])
+        lm, num = label(safe[r0:rows[-1] + 1, c0:cols[-1] + 1])
+        # find_objects returns every component's bounding slices in one pass
+        # over the label map, instead of one full-array scan per label.
         boxes: list[tuple[int,int,int,int]] = []
-        for lab in range(1, num+1):
-            ys, xs = np.nonzero(lm == lab)
-            if ys.size == 0:
+        for sl in find_objects(lm, max_label=num):
+            if sl is None:
                 continue
-            y0, y1 = ys.min(), ys.max()
-            x0, x1 = xs.min(), xs.max()
-            boxes.append((x0, y0, x1+w, y1+h))
-        return boxes
\ No newline at end of file
+            ys, xs = sl
+            boxes.append((
+                c0 + xs.start, r0 + ys.start,
+                c0 + xs.stop - 1 + w, r0 + ys.stop - 1 + h
+            ))
+        return boxes
+
+    def _safe_map(
+        self,
+        mask: np.ndarray,
+        min_count: float
+    ) -> np.ndarray:
+        """
+        Boolean map of window positions whose window holds >= min_count mask pixels.
+
+        Window sums never exceed h*w, so the integral image is accumulated in
+        the narrowest unsigned type that holds h*w and differences are taken
+        with wrap-around arithmetic, which is exact modulo 2**bits. Rows are
+        processed in bands through a workspace shared by all annotations of
+        this generator, bounding memory by max_workspace_pixels instead of
+        the mask size.
+
+        Args:
+            mask: Local boolean mask array.
+            min_count: Minimum number of mask pixels per window.
+
+        Returns:
+            Array of shape (H - h + 1, W - w + 1).
+        """
+        H, W = mask.shape
+        h, w = self.window_size
+        out_h, out_w = H - h + 1, W - w + 1
+        if out_h <= 0 or out_w <= 0:
+            return np.zeros((max(out_h, 0), max(out_w, 0)), dtype=bool)
+        threshold = int(np.ceil(min_count))
+        if threshold > h * w:
+            return np.zeros((out_h, out_w), dtype=bool)
+
+        dtype = np.uint16 if h * w <= np.iinfo(np.uint16).max else np.uint32
+        band = max(1, self.max_workspace_pixels // (W + 1) - h)
+        ws = self._workspace_view((min(band, out_h) + h) * (W + 1), dtype)
+
+        safe = np.empty((out_h, out_w), dtype=bool)
+        for r0 in range(0, out_h, band):
+            r1 = min(out_h, r0 + band)
+            rows = r1 - r0 + h - 1
+            ii = ws[:(rows + 1) * (W + 1)].reshape(rows + 1, W + 1)
+            ii[0] = 0
+            ii[:, 0] = 0
+            ii[1:, 1:] = mask[r0:r0 + rows]
+            np.cumsum(ii, axis=0, out=ii)
+            np.cumsum(ii, axis=1, out=ii)
+            sums = ii[h:, w:] - ii[:-h, w:]
+            sums -= ii[h:, :-w]
+            sums += ii[:-h, :-w]
+            np.greater_equal(sums, threshold, out=safe[r0:r1])
+        return safe
+
+    def _workspace_view(self, size: int, dtype) -> np.ndarray:
+        """Return a flat scratch array of at least `size` elements, reusing memory."""
+        nbytes = size * np.dtype(dtype).itemsize
+        if self._workspace is None or self._workspace.nbytes < nbytes:
+            self._workspace = np.empty(nbytes, dtype=np.uint8)
+        return self._workspace[:nbytes].view(dtype)
+
+
+class SharedMasks:
+    """
+    Annotation masks of one image, shared by generators with different
+    window sizes (e.g. a multi-configuration export).
+
+    Rectangles are rasterized once, with the largest margin; the mask for a
+    smaller margin is a view into it. Pillow's polygon fill is not exactly
+    translation-invariant, so polygons are rasterized once per margin, which
+    keeps every mask identical to that of an unshared generator.
+    """
+    def __init__(self, image_size: tuple[int, int], max_margin: tuple[int, int]) -> None:
+        """
+        Args:
+            image_size: (width, height) of the full image.
+            max_margin: Largest window_size of the generators sharing the masks.
+        """
+        self.image_size = image_size
+        self.max_margin = max_margin
+        self._masks: dict[tuple, tuple[np.ndarray, tuple[int, int]]] = {}
+
+    def mask(
+        self,
+        annotation: dict,
+        margin: tuple[int, int]
+    ) -> tuple[np.ndarray, tuple[int, int]]:
+        """Local mask and (left, top) offset of an annotation with the given margin."""
+        is_rect = annotation.get("type") == "rect"
+        if is_rect and (margin[0] > self.max_margin[0] or margin[1] > self.max_margin[1]):
+            return rasterize_annotation(annotation, self.image_size, margin)
+        drawn_margin = self.max_margin if is_rect else tuple(margin)
+        key = (annotation.get("type"), tuple(tuple(p) for p in annotation["points"]),
+               drawn_margin)
+        shared = self._masks.get(key)
+        if shared is None:
+            shared = rasterize_annotation(annotation, self.image_size, drawn_margin)
+            shared[0].setflags(write=False)
+            self._masks[key] = shared
+        if not is_rect:
+            return shared
+        full, (fl, ft) = shared
+        left, top, right, bottom = _mask_window(
+            _annotation_bounds(annotation), self.image_size, margin
+        )
+        return full[top - ft:bottom - ft, left - fl:right - fl], (left, top)
+
+
+def _annotation_bounds(annotation: dict) -> tuple[int, int, int, int]:
+    """Integer bounding box (x0, y0, x1, y1) of an annotation's points."""
+    pts = annotation["points"]
+    if annotation.get("type") == "rect":
+        (x0, y0), (x1, y1) = pts
+    else:
+        xs, ys = zip(*pts)
+        x0, x1 = min(xs), max(xs)
+        y0, y1 = min(ys), max(ys)
+    return (int(np.floor(x0)), int(np.floor(y0)),
+            int(np.ceil(x1)), int(np.ceil(y1)))
+
+
+def _mask_window(
+    bounds: tuple[int, int, int, int],
+    image_size: tuple[int, int],
+    margin: tuple[int, int]
+) -> tuple[int, int, int, int]:
+    """The bounds expanded by the margin and clipped to the image."""
+    img_w, img_h = image_size
+    x0_i, y0_i, x1_i, y1_i = bounds
+    w_m, h_m = margin
+    return (max(0, x0_i - w_m), max(0, y0_i - h_m),
+            min(img_w, x1_i + w_m), min(img_h, y1_i + h_m))
+
+
+def rasterize_annotation(
+    annotation: dict,
+    image_size: tuple[int, int],
+    margin: tuple[int, int]
+) -> tuple[np.ndarray, tuple[int, int]]:
+    """
+    Rasterize an annotation into a local boolean mask around its bounding box.
+
+    Args:
+        annotation: Annotation dict with 'type' and 'points'.
+        image_size: (width, height) of the full image.
+        margin: (x, y) margin added around the bounding box.
+
+    Returns:
+        mask: Local boolean mask array.
+        offset: (left, top) top-left of mask in global coords.
+    """
+    bounds = _annotation_bounds(annotation)
+    x0_i, y0_i, x1_i, y1_i = bounds
+    left, top, right, bottom = _mask_window(bounds, image_size, margin)
+    w_loc, h_loc = right - left, bottom - top
+
+    mask_img = Image.new("L", (w_loc, h_loc), 0)
+    draw = ImageDraw.Draw(mask_img)
+    if annotation.get("type") == "rect":
+        rx0, ry0 = x0_i - left, y0_i - top
+        rx1, ry1 = x1_i - left, y1_i - top
+        draw.rectangle([rx0, ry0, rx1, ry1], fill=1)
+    else:
+        local_pts = [
+            (int(round(x)) - left, int(round(y)) - top)
+            for x, y in annotation["points"]
+        ]
+        draw.polygon(local_pts, fill=1)
+
+    mask = np.array(mask_img, dtype=bool)
+    return mask, (left, top)
@@ -0,0 +1,166 @@
+# src/artifacts_annotator/generators/thumbnail_cache.py
+"""
+Persistent thumbnail cache stored in a single SQLite file.
+
+Entries are keyed by image path and thumbnail size and are only returned
+while the image's mtime and file size still match. The total size of stored
+thumbnails is capped; least-recently-used entries are evicted first.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from artifacts_annotator.config import load_settings, user_cache_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbnails (
+    path      TEXT    NOT NULL,
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    file_size INTEGER NOT NULL,
+    data      BLOB    NOT NULL,
+    last_used REAL    NOT NULL,
+    PRIMARY KEY (path, size)
+)
+"""
+
+# Hits only refresh last_used in batches to keep lookups read-only.
+_TOUCH_BATCH = 256
+
+
+class ThumbnailCache:
+    """Thread-safe SQLite store of encoded thumbnails."""
+    def __init__(self, db_path: str, max_bytes: int = 512 << 20) -> None:
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS thumbnails_lru ON thumbnails(last_used)"
+        )
+        self._conn.commit()
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM thumbnails"
+        ).fetchone()
+        self._bytes = int(row[0])
+        self._touched: dict[tuple[str, int], float] = {}
+
+    @classmethod
+    def from_settings(cls, settings_path: str = "settings.yaml") -> Optional["ThumbnailCache"]:
+        """
+        Build the cache from the 'thumbnail_cache' section of the settings
+        file (keys: enabled, path, max_mb). Returns None if disabled or if
+        the database cannot be opened.
+        """
+        cfg = load_settings(settings_path).get("thumbnail_cache") or {}
+        if not cfg.get("enabled", True):
+            return None
+        path = cfg.get("path") or os.path.join(user_cache_dir(), "thumbnails.sqlite")
+        max_bytes = int(float(cfg.get("max_mb", 512)) * (1 << 20))
+        try:
+            return cls(os.path.expanduser(path), max_bytes)
+        except sqlite3.Error:
+            return None
+
+    def get(self, path: str, size: int, stat: os.stat_result) -> Optional[bytes]:
+        """
+        Return cached thumbnail bytes, or None if missing or stale.
+
+        Args:
+            path: Image path.
+            size: Thumbnail edge length.
+            stat: Current os.stat() of the image.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, file_size, data FROM thumbnails WHERE path=? AND size=?",
+                (path, size)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] != stat.st_mtime_ns or row[1] != stat.st_size:
+                self._conn.execute(
+                    "DELETE FROM thumbnails WHERE path=? AND size=?", (path, size)
+                )
+                self._conn.commit()
+                self._bytes -= len(row[2])
+                return None
+            self._touched[(path, size)] = time.time()
+            if len(self._touched) >= _TOUCH_BATCH:
+                self._flush_touched()
+            return row[2]
+
+    def put(self, path: str, size: int, stat: os.stat_result, data: bytes) -> None:
+        """Store encoded thumbnail bytes for the given image state."""
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT LENGTH(data) FROM thumbnails WHERE path=? AND size=?",
+                (path, size)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?, ?)",
+                (path, size, stat.st_mtime_ns, stat.st_size, sqlite3.Binary(data), time.time())
+            )
+            self._bytes += len(data) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def flush(self) -> None:
+        """Persist pending last-used timestamps."""
+        with self._lock:
+            self._flush_touched()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
+
+    def _flush_touched(self) -> None:
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE thumbnails SET last_used=? WHERE path=? AND size=?",
+            [(t, p, s) for (p, s), t in self._touched.items()]
+        )
+        self._conn.commit()
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        """Delete least-recently-used rows until 90% of the cap is reached."""
+        self._flush_touched()
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT path, size, LENGTH(data) FROM thumbnails ORDER BY last_used"
+        )
+        victims = []
+        for path, size, length in rows:
+            if self._bytes <= target:
+                break
+            victims.append((path, size))
+            self._bytes -= length
+        rows.close()
+        self._conn.executemany(
+            "DELETE FROM thumbnails WHERE path=? AND size=?", victims
+        )
+
+
+_default_cache: Optional[ThumbnailCache] = None
+_default_loaded = False
+_default_lock = threading.Lock()
+
+
+def default_thumbnail_cache() -> Optional[ThumbnailCache]:
+    """Process-wide cache configured from settings.yaml (None if disabled)."""
+    global _default_cache, _default_loaded
+    with _default_lock:
+        if not _default_loaded:
+            _default_cache = ThumbnailCache.from_settings()
+            _default_loaded = True
+        return _default_cache
@@ -1,34 +1,135 @@
 # src/my_package_name/generators/thumbnail_loader.py
-import io
+import os
+from typing import Iterable, Optional
 from PIL import Image
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtGui import QImage
 from PyQt5.QtCore import QRunnable, QThreadPool, pyqtSignal, QObject
+from .thumbnail_cache import ThumbnailCache, default_thumbnail_cache
+from .thumbnail_render import render_thumbnail, encode_thumbnail
+from ..config import load_settings
 
 class ThumbnailSignal(QObject):
-    loaded = pyqtSignal(str, QPixmap)
+    # QImage rather than QPixmap: pixmaps may only be created on the GUI thread.
+    loaded = pyqtSignal(str, QImage)
+    # Internal: worker result tagged with the generation it was requested in.
+    finished = pyqtSignal(str, QImage, int)
 
 class ThumbnailLoader:
-    """Asynchronously generate 128×128 thumbnails."""
-    def __init__(self) -> None:
+    """
+    Asynchronously generate 128×128 thumbnails, backed by a persistent cache.
+
+    Work is demand-driven: `request()` replaces the set of wanted thumbnails
+    in priority order, dropping queued tasks that are no longer wanted and
+    reprioritizing the rest. `cancel()` drops everything still queued and
+    discards results of tasks that are already running.
+    """
+    def __init__(
+        self,
+        cache: Optional[ThumbnailCache] = None,
+        max_threads: Optional[int] = None
+    ) -> None:
         self.pool = QThreadPool()
+        if max_threads is None:
+            cfg = load_settings().get("thumbnails") or {}
+            max_threads = cfg.get("threads")
+        if max_threads:
+            self.pool.setMaxThreadCount(max(1, int(max_threads)))
         self.signals = ThumbnailSignal()
+        self.signals.finished.connect(self._on_finished)
+        self.cache = cache if cache is not None else default_thumbnail_cache()
+        self._generation = 0
+        self._pending: dict[str, _ThumbnailTask] = {}
+
+    def load(self, path: str, size: int = 128, priority: int = 0) -> None:
+        """Queue a single thumbnail unless it is already pending."""
+        if path not in self._pending:
+            self._start(_ThumbnailTask(path, size, self.signals.finished,
+                                       self._generation, self.cache), priority)
+
+    def request(self, paths: Iterable[str], size: int = 128) -> None:
+        """
+        Make `paths` (most urgent first) the only queued thumbnails.
+
+        Queued tasks for other paths are removed from the pool; tasks that
+        have already started are left to finish.
+        """
+        wanted = list(dict.fromkeys(paths))
+        keep = set(wanted)
+        for path, task in list(self._pending.items()):
+            if path not in keep and self.pool.tryTake(task):
+                del self._pending[path]
+        for rank, path in enumerate(wanted):
+            task = self._pending.get(path)
+            if task is None:
+                task = _ThumbnailTask(path, size, self.signals.finished,
+                                      self._generation, self.cache)
+            elif task.started or not self.pool.tryTake(task):
+                continue
+            self._start(task, len(wanted) - rank)
 
-    def load(self, path: str, size: int = 128) -> None:
-        task = _ThumbnailTask(path, size, self.signals.loaded)
-        self.pool.start(task)
+    def cancel(self) -> None:
+        """Drop all queued work and ignore results still in flight."""
+        self.pool.clear()
+        self._pending.clear()
+        self._generation += 1
+
+    def _start(self, task: "_ThumbnailTask", priority: int) -> None:
+        self._pending[task.path] = task
+        self.pool.start(task, priority)
+
+    def _on_finished(self, path: str, image: QImage, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._pending.pop(path, None)
+        self.signals.loaded.emit(path, image)
+
+def pil_to_qimage(img: Image.Image) -> QImage:
+    """Wrap an RGB/RGBA PIL image's raw buffer in a QImage (deep-copied)."""
+    fmt = QImage.Format_RGBA8888 if img.mode == "RGBA" else QImage.Format_RGB888
+    data = img.tobytes()
+    qimg = QImage(data, img.width, img.height, len(data) // img.height, fmt)
+    return qimg.copy()
 
 class _ThumbnailTask(QRunnable):
-    def __init__(self, path: str, size: int, signal: pyqtSignal) -> None:
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        signal: pyqtSignal,
+        generation: int,
+        cache: Optional[ThumbnailCache] = None
+    ) -> None:
         super().__init__()
+        # The loader keeps a reference while queued so it can tryTake() it;
+        # Qt must not delete the C++ object underneath that reference.
+        self.setAutoDelete(False)
         self.path = path
         self.size = size
         self.signal = signal
+        self.generation = generation
+        self.cache = cache
+        self.started = False
 
     def run(self) -> None:
-        img = Image.open(self.path)
-        img.thumbnail((self.size, self.size), resample=Image.LANCZOS)
-        buf = io.BytesIO()
-        img.save(buf, format='PNG')
-        pixmap = QPixmap()
-        pixmap.loadFromData(buf.getvalue())
-        self.signal.emit(self.path, pixmap)
+        self.started = True
+        self.signal.emit(self.path, self._render(), self.generation)
+
+    def _render(self) -> QImage:
+        stat = None
+        if self.cache is not None:
+            try:
+                stat = os.stat(self.path)
+                data = self.cache.get(self.path, self.size, stat)
+            except OSError:
+                stat, data = None, None
+            if data is not None:
+                image = QImage.fromData(data)
+                if not image.isNull():
+                    return image
+        try:
+            thumb = render_thumbnail(self.path, self.size)
+        except Exception:
+            return QImage()
+        if self.cache is not None and stat is not None:
+            self.cache.put(self.path, self.size, stat, encode_thumbnail(thumb))
+        return pil_to_qimage(thumb)
@@ -0,0 +1,90 @@
+# src/artifacts_annotator/generators/thumbnail_render.py
+"""
+Fast thumbnail decoding (Qt-free).
+
+Avoids decoding full-resolution pixels where possible:
+  * embedded EXIF thumbnails of JPEGs are used when large enough,
+  * multi-page TIFFs use the smallest reduced page that is large enough,
+  * JPEGs are otherwise decoded with DCT scaling (Image.draft),
+and the final resize uses a box reduce followed by a bilinear filter.
+"""
+
+import io
+from typing import Optional
+
+from PIL import ExifTags, Image
+
+# ExifTags.IFD is only available on newer Pillow versions.
+_IFD1 = getattr(getattr(ExifTags, "IFD", None), "IFD1", -1)
+_JPEG_IF_OFFSET = 0x0201
+_JPEG_IF_LENGTH = 0x0202
+_MAX_TIFF_PAGES = 16
+
+
+def render_thumbnail(path: str, size: int = 128) -> Image.Image:
+    """
+    Decode an image scaled to fit in size×size.
+
+    Args:
+        path: Image path.
+        size: Maximum edge length.
+
+    Returns:
+        An RGB or RGBA image.
+    """
+    img = Image.open(path)
+    img = _exif_thumbnail(img, size) or _reduced_page(img, size) or img
+    img.thumbnail((size, size), resample=Image.BILINEAR, reducing_gap=2.0)
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or (
+        img.mode == "P" and "transparency" in img.info
+    )
+    mode = "RGBA" if has_alpha else "RGB"
+    return img if img.mode == mode else img.convert(mode)
+
+
+def encode_thumbnail(img: Image.Image) -> bytes:
+    """Encode a rendered thumbnail compactly for the persistent cache."""
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+
+def _same_aspect(a: tuple[int, int], b: tuple[int, int]) -> bool:
+    return abs(a[0] * b[1] - a[1] * b[0]) <= 0.02 * a[0] * b[1]
+
+
+def _exif_thumbnail(img: Image.Image, size: int) -> Optional[Image.Image]:
+    """Return the embedded EXIF JPEG thumbnail if it can stand in for the image."""
+    if img.format != "JPEG" or "exif" not in img.info:
+        return None
+    try:
+        ifd1 = img.getexif().get_ifd(_IFD1)
+        start, length = ifd1[_JPEG_IF_OFFSET], ifd1[_JPEG_IF_LENGTH]
+        raw = img.info["exif"]
+        # Offsets are relative to the TIFF header after the "Exif\0\0" marker.
+        base = 6 if raw.startswith(b"Exif") else 0
+        thumb = Image.open(io.BytesIO(raw[base + start:base + start + length]))
+        thumb.load()
+    except Exception:
+        return None
+    if max(thumb.size) < size or not _same_aspect(thumb.size, img.size):
+        return None
+    return thumb
+
+
+def _reduced_page(img: Image.Image, size: int) -> Optional[Image.Image]:
+    """For multi-page TIFF pyramids, seek to the smallest page still >= size."""
+    if img.format != "TIFF" or getattr(img, "n_frames", 1) <= 1:
+        return None
+    full = img.size
+    best, best_area = None, full[0] * full[1]
+    for i in range(1, min(img.n_frames, _MAX_TIFF_PAGES)):
+        try:
+            img.seek(i)
+        except EOFError:
+            break
+        w, h = img.size
+        if max(w, h) >= size and w * h < best_area and _same_aspect((w, h), full):
+            best, best_area = i, w * h
+    img.seek(best or 0)
+    return img if best else None
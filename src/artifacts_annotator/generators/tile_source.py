@@ -0,0 +1,159 @@
+# src/artifacts_annotator/generators/tile_source.py
+"""
+Multi-resolution tile decoding for the image viewer (Qt-free).
+
+Level L of the pyramid is the image downscaled by 2**L and is cut into
+square tiles of `tile_size` pixels. Tiles are produced as follows:
+  * uncompressed TIFFs read only the region a tile covers (levels up to
+    MAX_REGION_FACTOR), then reduce it,
+  * JPEG levels above 0 are decoded directly at reduced scale (draft mode),
+  * everything else decodes a whole level once and crops tiles out of it.
+Whole-level images are kept in a per-source LRU bounded by decoded bytes
+('viewer.level_cache_mb' in settings.yaml).
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from PIL import Image
+
+from artifacts_annotator.config import load_settings
+from artifacts_annotator.controllers.image_region import read_region, supports_partial_decode
+
+# Above this downscale factor a region read touches too many source pixels
+# per tile; a whole reduced level is decoded instead.
+MAX_REGION_FACTOR = 4
+
+
+class TileSource:
+    """Decodes pyramid tiles of one image file; safe to use from several threads."""
+    def __init__(
+        self,
+        path: str,
+        tile_size: int = 512,
+        max_level_bytes: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            path: Image file.
+            tile_size: Tile edge in pixels.
+            max_level_bytes: Budget of the decoded-level LRU; the level used
+                last is always kept, even if it alone exceeds the budget.
+                Defaults to the 'viewer.level_cache_mb' setting.
+        """
+        self.path = path
+        self.tile_size = tile_size
+        if max_level_bytes is None:
+            cfg = load_settings().get("viewer") or {}
+            max_level_bytes = int(float(cfg.get("level_cache_mb", 512)) * (1 << 20))
+        self.max_level_bytes = max_level_bytes
+        with Image.open(path) as img:
+            self.size: tuple[int, int] = img.size
+            self.format = img.format
+            self._partial = supports_partial_decode(img)
+        longest = max(self.size)
+        self.level_count = 1 + max(0, math.ceil(math.log2(max(1, longest / tile_size))))
+        self._levels: OrderedDict[int, Image.Image] = OrderedDict()
+        self._level_bytes = 0
+        self._lock = threading.Lock()
+
+    def level_for_scale(self, scale: float) -> int:
+        """Coarsest level that still has at least one source pixel per screen pixel."""
+        if scale <= 0:
+            return self.level_count - 1
+        level = int(math.floor(math.log2(1.0 / scale))) if scale < 1.0 else 0
+        return max(0, min(self.level_count - 1, level))
+
+    def level_size(self, level: int) -> tuple[int, int]:
+        f = 1 << level
+        return -(-self.size[0] // f), -(-self.size[1] // f)
+
+    def tile_grid(self, level: int) -> tuple[int, int]:
+        """Number of tile columns and rows at a level."""
+        w, h = self.level_size(level)
+        return -(-w // self.tile_size), -(-h // self.tile_size)
+
+    def tile_box(self, level: int, tx: int, ty: int) -> tuple[int, int, int, int]:
+        """Tile extent in level pixels: (left, top, right, bottom)."""
+        w, h = self.level_size(level)
+        t = self.tile_size
+        return tx * t, ty * t, min((tx + 1) * t, w), min((ty + 1) * t, h)
+
+    def has_level(self, level: int) -> bool:
+        return level in self._levels
+
+    def cached_tile(self, level: int, tx: int, ty: int) -> Optional[Image.Image]:
+        """The tile if its level is already decoded in memory (never blocks on I/O)."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            img = self._levels.get(level)
+            if img is None:
+                return None
+            self._levels.move_to_end(level)
+        finally:
+            self._lock.release()
+        return img.crop(self.tile_box(level, tx, ty))
+
+    def read_tile(self, level: int, tx: int, ty: int) -> Image.Image:
+        """Decode one tile as an RGB or RGBA image."""
+        box = self.tile_box(level, tx, ty)
+        f = 1 << level
+        if self._partial and f <= MAX_REGION_FACTOR:
+            full = (box[0] * f, box[1] * f,
+                    min(box[2] * f, self.size[0]), min(box[3] * f, self.size[1]))
+            with Image.open(self.path) as img:
+                region, origin = read_region(img, full)
+                region = region.crop((full[0] - origin[0], full[1] - origin[1],
+                                      full[2] - origin[0], full[3] - origin[1]))
+            if f > 1:
+                region = region.resize((box[2] - box[0], box[3] - box[1]),
+                                       Image.BILINEAR, reducing_gap=2.0)
+            return _display_mode(region)
+        return self.level_image(level).crop(box)
+
+    def level_image(self, level: int) -> Image.Image:
+        """Decode (or reuse) a whole pyramid level."""
+        with self._lock:
+            img = self._levels.get(level)
+            if img is not None:
+                self._levels.move_to_end(level)
+                return img
+            img = self._decode_level(level)
+            self._levels[level] = img
+            self._level_bytes += _nbytes(img)
+            while self._level_bytes > self.max_level_bytes and len(self._levels) > 1:
+                _, old = self._levels.popitem(last=False)
+                self._level_bytes -= _nbytes(old)
+            return img
+
+    def _decode_level(self, level: int) -> Image.Image:
+        size = self.level_size(level)
+        finer = [lv for lv in self._levels if lv < level]
+        if finer:
+            src = self._levels[max(finer)]
+        else:
+            src = Image.open(self.path)
+            if level and self.format == "JPEG":
+                src.draft("RGB", size)  # DCT scaling: decodes at >= size
+            src = _display_mode(src)
+        if src.size != size:
+            src = src.resize(size, Image.BILINEAR, reducing_gap=2.0)
+        return src
+
+
+def _nbytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+def _display_mode(img: Image.Image) -> Image.Image:
+    has_alpha = img.mode in ("RGBA", "LA", "PA") or (
+        img.mode == "P" and "transparency" in img.info
+    )
+    mode = "RGBA" if has_alpha else "RGB"
+    if img.mode == mode:
+        img.load()
+        return img
+    return img.convert(mode)
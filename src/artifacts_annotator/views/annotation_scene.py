@@ -1,12 +1,20 @@
 # src/artifacts_annotator/views/annotation_scene.py
+from itertools import count
 from PyQt5.QtWidgets import (
     QGraphicsScene, QGraphicsRectItem, QGraphicsPolygonItem, QGraphicsItem
 )
-from PyQt5.QtGui import QPen, QBrush, QPolygonF, QColor
+from PyQt5.QtGui import QPen, QBrush, QPolygonF, QColor, QPainterPath
 from PyQt5.QtCore import Qt, QPointF, QRectF
 
 class AnnotationScene(QGraphicsScene):
-    """Scene supporting rectangle and polygon annotations with classified types."""
+    """
+    Scene supporting rectangle and polygon annotations with classified types.
+
+    Annotations are keyed by an integer id that is also stored on their
+    graphics item (`item.data(0)`), so lookups, deletes and retyping never
+    scan the annotation list. Hit testing and rubber-band selection rely on
+    QGraphicsScene's default BSP tree index; no index of our own is kept.
+    """
     def __init__(
         self,
         parent=None,
@@ -18,13 +26,90 @@ class AnnotationScene(QGraphicsScene):
         self.temp_item = None
         self.start_point = QPointF()
         self.poly_points: list[QPointF] = []
-        # List of annotation dicts: {'type':..., 'artifact_type':..., 'points':...}
-        self.annotations: list[dict] = []
+        # id → annotation dict: {'type':..., 'artifact_type':..., 'points':...}
+        self._anns: dict[int, dict] = {}
+        # id → graphics item of annotations currently drawn
+        self._items: dict[int, QGraphicsItem] = {}
+        self._ids = count()
+        # Set whenever annotations change; cleared by whoever persists them.
+        self.dirty = False
         # Mapping artifact_type → hex color
         self.type_colors = type_colors or {}
         # Current artifact type for new annotations
         self.current_artifact_type = default_type or next(iter(self.type_colors), None)
 
+    @property
+    def annotations(self) -> list[dict]:
+        """Annotation dicts in creation order (a new list; the dicts are live)."""
+        return list(self._anns.values())
+
+    @annotations.setter
+    def annotations(self, anns: list[dict]) -> None:
+        """Replace all annotations; call _draw_all() to show them."""
+        for item in self._items.values():
+            if item.scene() is self:
+                self.removeItem(item)
+        self._items.clear()
+        self._anns = {next(self._ids): ann for ann in anns}
+
+    def annotation(self, item: QGraphicsItem):
+        """The annotation dict drawn by `item`, or None."""
+        return self._anns.get(item.data(0))
+
+    def clear(self) -> None:
+        """Remove all items; annotations are kept and can be redrawn."""
+        super().clear()
+        self._items.clear()
+        self.temp_item = None
+
+    def select_all(self) -> None:
+        """Select every annotation item, emitting selectionChanged once."""
+        path = QPainterPath()
+        path.addRect(self.itemsBoundingRect())
+        self.setSelectionArea(path, Qt.IntersectsItemBoundingRect)
+
+    def selected_types(self) -> set[str]:
+        """Artifact types of the selected annotations."""
+        return {
+            self._anns[item.data(0)].get('artifact_type')
+            for item in self.selectedItems() if item.data(0) in self._anns
+        }
+
+    def set_selected_type(self, art_type: str) -> int:
+        """Retype the selected annotations; returns how many changed."""
+        pen = self._pen_for(art_type)
+        changed = 0
+        for item in self.selectedItems():
+            ann = self._anns.get(item.data(0))
+            if ann is None:
+                continue
+            ann['artifact_type'] = art_type
+            item.setPen(pen)
+            changed += 1
+        if changed:
+            self.dirty = True
+        return changed
+
+    def delete_selected(self) -> None:
+        """Remove the selected annotations and their items."""
+        items = self.selectedItems()
+        # Deselect first: removing selected items one by one would emit
+        # selectionChanged for each of them.
+        self.clearSelection()
+        for item in items:
+            ann_id = item.data(0)
+            if self._anns.pop(ann_id, None) is not None:
+                self.dirty = True
+            self._items.pop(ann_id, None)
+            self.removeItem(item)
+
+    def _add_annotation(self, ann: dict, item: QGraphicsItem) -> None:
+        ann_id = next(self._ids)
+        self._anns[ann_id] = ann
+        self._items[ann_id] = item
+        item.setData(0, ann_id)
+        self.dirty = True
+
     def set_mode(self, mode: str) -> None:
         self.mode = mode
         if self.temp_item:
@@ -62,8 +147,7 @@ class AnnotationScene(QGraphicsScene):
                     'artifact_type': self.current_artifact_type,
                     'points': [[p.x(), p.y()] for p in self.poly_points]
                 }
-                self.annotations.append(ann)
-                self.temp_item.setData(0, ann)
+                self._add_annotation(ann, self.temp_item)
                 self.temp_item = None
                 self.poly_points.clear()
 
@@ -103,8 +187,7 @@ class AnnotationScene(QGraphicsScene):
                     [rect.x() + rect.width(), rect.y() + rect.height()]
                 ]
             }
-            self.annotations.append(ann)
-            self.temp_item.setData(0, ann)
+            self._add_annotation(ann, self.temp_item)
             self.temp_item = None
 
         elif self.mode == 'select':
@@ -114,11 +197,7 @@ class AnnotationScene(QGraphicsScene):
 
     def keyPressEvent(self, event) -> None:
         if event.key() == Qt.Key_Delete and self.mode == 'select':
-            for item in list(self.selectedItems()):
-                ann = item.data(0)
-                if ann in self.annotations:
-                    self.annotations.remove(ann)
-                self.removeItem(item)
+            self.delete_selected()
         elif event.key() == Qt.Key_Escape and self.mode == 'poly':
             if self.temp_item:
                 self.removeItem(self.temp_item)
@@ -129,7 +208,9 @@ class AnnotationScene(QGraphicsScene):
 
     def _draw_all(self) -> None:
         """Redraw all loaded annotations with their type-specific colors."""
-        for ann in self.annotations:
+        for ann_id, ann in self._anns.items():
+            if ann_id in self._items:
+                continue
             art_type = ann.get('artifact_type')
             if ann['type'] == 'rect':
                 p0, p1 = ann['points']
@@ -142,5 +223,6 @@ class AnnotationScene(QGraphicsScene):
             item.setPen(self._pen_for(art_type))
             item.setBrush(self._brush())
             item.setFlag(QGraphicsItem.ItemIsSelectable, True)
-            item.setData(0, ann)
+            item.setData(0, ann_id)
             self.addItem(item)
+            self._items[ann_id] = item
@@ -1,15 +1,19 @@
 # src/artifacts_annotator/views/image_viewer.py
 import os
-from typing import List
+from typing import List, Optional
 from PyQt5.QtWidgets import (
     QGraphicsView, QMainWindow, QShortcut, QToolBar,
-    QAction, QActionGroup, QComboBox, QGraphicsItem
+    QAction, QActionGroup, QComboBox
 )
-from PyQt5.QtGui import QPixmap, QKeySequence, QCursor
-from PyQt5.QtCore import Qt, QRectF, pyqtSignal, QSettings, QByteArray
+from PyQt5.QtGui import QKeySequence, QCursor
+from PyQt5.QtCore import Qt, pyqtSignal, QSettings, QByteArray
 from ..controllers.annotation_manager import AnnotationManager
+from ..controllers.annotation_save_queue import AnnotationSaveQueue
+from ..controllers.image_prefetcher import ImagePrefetcher
 from .annotation_scene import AnnotationScene
-from ..config import load_artifact_types
+from .tiled_image_item import TiledImageItem, TileLoader
+from ..generators.tile_source import TileSource
+from ..config import load_artifact_types, load_settings
 
 class ImageViewer(QGraphicsView):
     """Displays an image with zoom, pan, draw & select modes."""
@@ -34,28 +38,42 @@ class ImageViewer(QGraphicsView):
         self.scale_factor = 1.0
         self.setDragMode(QGraphicsView.ScrollHandDrag)
         self.setMouseTracking(True)
+        cfg = load_settings().get("viewer") or {}
+        self.sync_decode_pixels = int(float(cfg.get("sync_decode_mp", 16)) * 1e6)
+        self.tile_loader = TileLoader()
 
-    def load_image(self, path: str) -> QPixmap:
+    def load_image(self, path: str) -> TiledImageItem:
         """Load image at 100% and clear old items."""
-        self.scene_obj.clear()
-        pix = QPixmap(path)
-        self.scene_obj.addPixmap(pix)
-        self.setSceneRect(QRectF(pix.rect()))
+        item = self._set_image(path)
         self.resetTransform()
         self._zoom_index = self.ZOOM_LEVELS.index(1.0)
         self.scale_factor = 1.0
         self.zoomChanged.emit(100)
-        return pix
+        return item
 
-    def replace_image(self, path: str) -> QPixmap:
+    def replace_image(self, path: str, source: Optional[TileSource] = None) -> TiledImageItem:
         """Swap in a new image, then redraw annotations."""
-        self.scene_obj.clear()
-        pix = QPixmap(path)
-        self.scene_obj.addPixmap(pix)
-        self.setSceneRect(QRectF(pix.rect()))
+        item = self._set_image(path, source)
         self.scene_obj._draw_all()
         self.zoomChanged.emit(int(self.scale_factor * 100))
-        return pix
+        return item
+
+    def _set_image(self, path: str, source: Optional[TileSource] = None) -> TiledImageItem:
+        """Replace the scene contents with a tiled item for `path`."""
+        self.scene_obj.clear()
+        self.tile_loader.cancel()
+        item = TiledImageItem(path, self.tile_loader, source)
+        # The level shown at the current zoom is decoded up front when it
+        # has at most sync_decode_pixels (as a single pixmap used to be), so
+        # ordinary images never show placeholder tiles. Prefetched sources
+        # already hold it.
+        level = item.source.level_for_scale(self.scale_factor)
+        w, h = item.source.level_size(level)
+        if w * h <= self.sync_decode_pixels:
+            item.source.level_image(level)
+        self.scene_obj.addItem(item)
+        self.setSceneRect(item.boundingRect())
+        return item
 
     def wheelEvent(self, event) -> None:
         """Ctrl+wheel adjusts zoom; plain wheel pans or scrolls."""
@@ -95,7 +113,7 @@ class ImageViewer(QGraphicsView):
 
 class ImageViewerWindow(QMainWindow):
     """Window that holds ImageViewer and manages per-image annotations."""
-    def __init__(self, files: List[str], index: int = 0) -> None:
+    def __init__(self, files: List[str], index: int = 0, root: Optional[str] = None) -> None:
         super().__init__()
         self.settings = QSettings('Roee','artifact-label-tool')
         geom = self.settings.value('viewerGeometry')
@@ -109,8 +127,7 @@ class ImageViewerWindow(QMainWindow):
 
         self.files = files
         self.index = index
-        folder = os.path.dirname(files[0])
-        self.ann_mgr = AnnotationManager(folder)
+        self._open_annotations(root or os.path.dirname(files[0]))
 
         self.viewer = ImageViewer(
             self,
@@ -158,22 +175,16 @@ class ImageViewerWindow(QMainWindow):
 
     def _select_all(self) -> None:
         """Select all annotation items in the scene."""
-        scene = self.viewer.scene_obj
-        for item in scene.items():
-            if item.flags() & QGraphicsItem.ItemIsSelectable:
-                item.setSelected(True)
-        self._on_scene_selection_changed()
+        self.viewer.scene_obj.select_all()
 
     def _on_scene_selection_changed(self) -> None:
         """Update combo box based on current selection."""
-        items = self.viewer.scene_obj.selectedItems()
-        if not items:
+        unique = self.viewer.scene_obj.selected_types()
+        if not unique:
             self.type_combo.blockSignals(True)
             self.type_combo.setCurrentText(self.current_artifact_type)
             self.type_combo.blockSignals(False)
             return
-        types = [item.data(0)['artifact_type'] for item in items]
-        unique = set(types)
         self.type_combo.blockSignals(True)
         if len(unique) == 1:
             self.type_combo.setCurrentText(next(iter(unique)))
@@ -190,30 +201,7 @@ class ImageViewerWindow(QMainWindow):
             return
         self.current_artifact_type = new_type
         self.viewer.scene_obj.current_artifact_type = new_type
-        scene = self.viewer.scene_obj
-
-        for item in self.viewer.scene_obj.selectedItems():
-            # 1. Grab the copy from the item
-            ann_copy = item.data(0)
-
-            # 2. Find & update the *real* dict in scene.annotations
-            for ann in scene.annotations:
-                # match by identity or unique fields (points+type)
-                if ann is ann_copy or ann == ann_copy:
-                    ann['artifact_type'] = new_type
-                    real_ann = ann
-                    break
-            else:
-                # fallback: if not found, stick with the copy
-                real_ann = ann_copy
-                real_ann['artifact_type'] = new_type
-
-            # 3. Push the updated dict back into the item
-            item.setData(0, real_ann)
-
-            # 4. Redraw with the new pen
-            pen = self.viewer.scene_obj._pen_for(new_type)
-            item.setPen(pen)
+        self.viewer.scene_obj.set_selected_type(new_type)
 
     def _update_status(self, *args) -> None:
         z = int(self.viewer.scale_factor * 100)
@@ -229,20 +217,38 @@ class ImageViewerWindow(QMainWindow):
         path = self.files[self.index]
         self.setWindowTitle(path)
         self.viewer.scene_obj.clear()
-        self.viewer.scene_obj.annotations.clear()
+        self.viewer.scene_obj.annotations = []
+        pre = self.prefetcher.take(path)
         if initial and not self._restored:
-            pix = self.viewer.load_image(path)
-            self.resize(pix.width(), pix.height())
+            item = self.viewer.load_image(path)
+            self.resize(item.width(), item.height())
         else:
-            pix = self.viewer.replace_image(path)
-        anns = self.ann_mgr.load(path)
+            item = self.viewer.replace_image(path, pre.source if pre else None)
+        # Unwritten edits win over the (possibly stale) prefetched or on-disk copy.
+        anns = self.save_queue.pending(path)
+        if anns is None:
+            anns = pre.annotations if pre else self.ann_mgr.load(path)
         self.viewer.scene_obj.annotations = anns
+        self.viewer.scene_obj.dirty = False
         self.viewer.scene_obj._draw_all()
-        center = QRectF(pix.rect()).center()
+        center = item.boundingRect().center()
         self.viewer.centerOn(center)
+        self.prefetcher.update(self.files, self.index, self.viewer.scale_factor)
 
     def _save_annotations(self) -> None:
-        self.ann_mgr.save(self.files[self.index], self.viewer.scene_obj.annotations)
+        """Queue the current image's annotations for writing if they changed."""
+        scene = self.viewer.scene_obj
+        if not scene.dirty:
+            return
+        path = self.files[self.index]
+        self.save_queue.submit(path, scene.annotations)
+        scene.dirty = False
+        self.prefetcher.invalidate(path)
+
+    def flush_annotations(self) -> None:
+        """Save pending edits and wait until all queued writes are on disk."""
+        self._save_annotations()
+        self.save_queue.flush()
 
     def next_image(self) -> None:
         if self.index < len(self.files) - 1:
@@ -256,13 +262,30 @@ class ImageViewerWindow(QMainWindow):
             self.index -= 1
             self._load_current()
 
-    def update_images(self, files: List[str], index: int) -> None:
+    def update_images(self, files: List[str], index: int, root: Optional[str] = None) -> None:
         self._save_annotations()
+        self.prefetcher.clear()
+        root = root or os.path.dirname(files[0])
+        if root != self.ann_mgr.folder:
+            self._close_annotations()
+            self._open_annotations(root)
         self.files = files
         self.index = index
         self._load_current()
 
+    def _open_annotations(self, root: str) -> None:
+        """Open the annotation store of a dataset root."""
+        self.ann_mgr = AnnotationManager(root)
+        self.save_queue = AnnotationSaveQueue(self.ann_mgr)
+        self.prefetcher = ImagePrefetcher(self.ann_mgr, self.save_queue)
+
+    def _close_annotations(self) -> None:
+        self.prefetcher.shutdown()
+        self.save_queue.close()
+        self.ann_mgr.close()
+
     def closeEvent(self, event) -> None:
-        self._save_annotations()
+        self.flush_annotations()
+        self.prefetcher.clear()
         self.settings.setValue('viewerGeometry', self.saveGeometry())
         super().closeEvent(event)
@@ -1,49 +1,256 @@
 # src/my_package_name/views/thumbnail_grid.py
-from PyQt5.QtWidgets import QListWidget, QListWidgetItem
-from PyQt5.QtCore import pyqtSignal, Qt, QSize
-from PyQt5.QtGui import QIcon, QPixmap
-from typing import List
+import bisect
+from PyQt5.QtWidgets import QListView
+from PyQt5.QtCore import (
+    pyqtSignal, Qt, QSize, QPoint, QTimer, QAbstractListModel, QModelIndex
+)
+from PyQt5.QtGui import QIcon, QPixmap, QImage
+from typing import Any, List, Optional
 from ..generators.thumbnail_loader import ThumbnailLoader
+from ..config import load_settings
 
-class ThumbnailGrid(QListWidget):
-    """Grid of thumbnails; emits `thumbnail_clicked(path)`."""
+class ThumbnailModel(QAbstractListModel):
+    """
+    List model of image paths and their loaded thumbnails.
+
+    Rows are exposed to the view in batches through fetchMore(), every row
+    without a thumbnail shares one placeholder icon, and icons are only
+    held for thumbnails that have actually been loaded.
+    """
+    PathRole = Qt.UserRole
+
+    def __init__(self, batch_size: int = 1000, parent=None) -> None:
+        super().__init__(parent)
+        self.batch_size = batch_size
+        self._paths: List[str] = []
+        self._rows: dict[str, int] = {}
+        self._icons: dict[str, QIcon] = {}
+        self._failed: set = set()
+        self._exposed = 0
+        placeholder = QPixmap(128, 128)
+        placeholder.fill(Qt.blue)
+        self._placeholder = QIcon(placeholder)
+
+    def set_paths(self, paths: List[str]) -> None:
+        """Replace the model contents, dropping all loaded thumbnails."""
+        self.beginResetModel()
+        self._paths = list(paths)
+        self._rows = {p: i for i, p in enumerate(self._paths)}
+        self._icons.clear()
+        self._failed.clear()
+        self._exposed = min(len(self._paths), self.batch_size)
+        self.endResetModel()
+
+    def insert_paths(self, paths: List[str]) -> None:
+        """Insert new paths at their sorted positions (the model is kept sorted)."""
+        paths = sorted(p for p in set(paths) if p not in self._rows)
+        if not paths:
+            return
+        if len(paths) > 64:
+            # One reset is cheaper than many single-row inserts; loaded
+            # thumbnails are keyed by path and survive it.
+            self.beginResetModel()
+            self._paths = sorted(self._paths + paths)
+            self._rows = {p: i for i, p in enumerate(self._paths)}
+            self._exposed = min(len(self._paths), max(self._exposed, self.batch_size))
+            self.endResetModel()
+            return
+        for p in paths:
+            row = bisect.bisect_left(self._paths, p)
+            if row <= self._exposed:
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._paths.insert(row, p)
+                self._exposed += 1
+                self.endInsertRows()
+            else:
+                self._paths.insert(row, p)
+        self._rows = {p: i for i, p in enumerate(self._paths)}
+
+    def remove_paths(self, paths: List[str]) -> None:
+        rows = sorted({self._rows[p] for p in paths if p in self._rows}, reverse=True)
+        if not rows:
+            return
+        for row in rows:
+            path = self._paths[row]
+            if row < self._exposed:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._paths[row]
+                self._exposed -= 1
+                self.endRemoveRows()
+            else:
+                del self._paths[row]
+            self._icons.pop(path, None)
+            self._failed.discard(path)
+        self._rows = {p: i for i, p in enumerate(self._paths)}
+
+    def invalidate_paths(self, paths: List[str]) -> None:
+        """Forget loaded thumbnails so they are requested again."""
+        for p in paths:
+            self._icons.pop(p, None)
+            self._failed.discard(p)
+            row = self._rows.get(p)
+            if row is not None and row < self._exposed:
+                idx = self.index(row)
+                self.dataChanged.emit(idx, idx, [Qt.DecorationRole])
+
+    def path(self, row: int) -> str:
+        return self._paths[row]
+
+    def row_of(self, path: str) -> Optional[int]:
+        return self._rows.get(path)
+
+    def needs_thumbnail(self, path: str) -> bool:
+        return path not in self._icons and path not in self._failed
+
+    def set_thumbnail(self, path: str, image: QImage) -> None:
+        """Attach a loaded thumbnail (a null image marks the path as failed)."""
+        row = self._rows.get(path)
+        if row is None:
+            return
+        if image.isNull():
+            self._failed.add(path)
+            return
+        self._icons[path] = QIcon(QPixmap.fromImage(image))
+        if row < self._exposed:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx, [Qt.DecorationRole])
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._exposed
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and self._exposed < len(self._paths)
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        if parent.isValid():
+            return
+        end = min(len(self._paths), self._exposed + self.batch_size)
+        if end <= self._exposed:
+            return
+        self.beginInsertRows(QModelIndex(), self._exposed, end - 1)
+        self._exposed = end
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid() or index.row() >= self._exposed:
+            return None
+        path = self._paths[index.row()]
+        if role == Qt.DecorationRole:
+            return self._icons.get(path, self._placeholder)
+        if role == self.PathRole:
+            return path
+        return None
+
+class ThumbnailGrid(QListView):
+    """
+    Grid of thumbnails; emits `thumbnail_clicked(path)`.
+
+    Thumbnails are only requested for the rows on screen plus
+    `prefetch_rows` rows above and below, and the request is refreshed
+    whenever the view scrolls or resizes.
+    """
     thumbnail_clicked = pyqtSignal(str)
 
     def __init__(self, paths: List[str]) -> None:
         super().__init__()
-        self.setViewMode(QListWidget.IconMode)
+        self.setViewMode(QListView.IconMode)
         self.setIconSize(QSize(128, 128))
         self.setGridSize(QSize(150, 150))
-        self.setResizeMode(QListWidget.Adjust)
-        self.setFlow(QListWidget.LeftToRight)
+        self.setResizeMode(QListView.Adjust)
+        self.setFlow(QListView.LeftToRight)
         self.setWrapping(True)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(500)
+
+        cfg = load_settings().get("thumbnails") or {}
+        self.prefetch_rows = int(cfg.get("prefetch_rows", 2))
+
+        self.thumbnail_model = ThumbnailModel(int(cfg.get("batch_size", 1000)), self)
+        self.setModel(self.thumbnail_model)
 
         self.loader = ThumbnailLoader()
-        self.loader.signals.loaded.connect(self._on_loaded)
+        self.loader.signals.loaded.connect(self.thumbnail_model.set_thumbnail)
+
+        # Coalesce bursts of scroll/resize/insert events into one request.
+        self._request_timer = QTimer(self)
+        self._request_timer.setSingleShot(True)
+        self._request_timer.setInterval(30)
+        self._request_timer.timeout.connect(self._request_visible)
+        self.verticalScrollBar().valueChanged.connect(self._schedule_request)
+        self.thumbnail_model.rowsInserted.connect(self._schedule_request)
+        self.thumbnail_model.modelReset.connect(self._schedule_request)
         self.populate(paths)
 
     def populate(self, paths: List[str]) -> None:
-        self.clear()
-        for p in paths:
-            item = QListWidgetItem()
-            item.setData(Qt.UserRole, p)
-            placeholder = QPixmap(128, 128)
-            placeholder.fill(Qt.blue)
-            item.setIcon(QIcon(placeholder))
-            self.addItem(item)
-            self.loader.load(p)
-
-    def _on_loaded(self, path: str, pixmap: QPixmap) -> None:
-        if pixmap.isNull():
-            return
-        for i in range(self.count()):
-            item = self.item(i)
-            if item.data(Qt.UserRole) == path:
-                item.setIcon(QIcon(pixmap))
-                break
+        self.loader.cancel()
+        self.thumbnail_model.set_paths(paths)
+
+    def add_paths(self, paths: List[str]) -> None:
+        self.thumbnail_model.insert_paths(paths)
+        self._schedule_request()
+
+    def remove_paths(self, paths: List[str]) -> None:
+        self.thumbnail_model.remove_paths(paths)
+        self._schedule_request()
+
+    def refresh_paths(self, paths: List[str]) -> None:
+        """Reload the thumbnails of files whose contents changed."""
+        self.thumbnail_model.invalidate_paths(paths)
+        self._schedule_request()
+
+    def clear(self) -> None:
+        """Remove all items and cancel their pending thumbnail work."""
+        self.populate([])
+
+    def count(self) -> int:
+        return self.thumbnail_model.rowCount()
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        self._schedule_request()
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        self._schedule_request()
+
+    def _schedule_request(self, *args) -> None:
+        self._request_timer.start()
+
+    def _visible_rows(self) -> tuple[int, int]:
+        """First and last row intersecting the viewport (-1, -1 if none)."""
+        rect = self.viewport().rect()
+        step = max(1, min(self.gridSize().width(), self.gridSize().height()) // 2)
+        first, last = -1, -1
+        for y in range(rect.top(), rect.bottom() + 1, step):
+            for x in range(rect.left(), rect.right() + 1, step):
+                row = self.indexAt(QPoint(x, y)).row()
+                if row < 0:
+                    continue
+                first = row if first < 0 else min(first, row)
+                last = max(last, row)
+        return first, last
+
+    def _request_visible(self) -> None:
+        count = self.count()
+        if not count:
+            return
+        first, last = self._visible_rows()
+        if first < 0:
+            first, last = 0, 0
+        per_row = max(1, self.viewport().width() // max(1, self.gridSize().width()))
+        margin = self.prefetch_rows * per_row
+        # Visible items first, then the rows below (likely scroll direction), then above.
+        order = list(range(first, last + 1))
+        order += range(last + 1, min(count, last + 1 + margin))
+        order += range(first - 1, max(-1, first - 1 - margin), -1)
+        model = self.thumbnail_model
+        paths = (model.path(i) for i in order)
+        self.loader.request(p for p in paths if model.needs_thumbnail(p))
 
     def mousePressEvent(self, event) -> None:
-        item = self.itemAt(event.pos())
-        if item:
-            self.thumbnail_clicked.emit(item.data(Qt.UserRole))
+        index = self.indexAt(event.pos())
+        if index.isValid():
+            self.thumbnail_clicked.emit(index.data(ThumbnailModel.PathRole))
         super().mousePressEvent(event)
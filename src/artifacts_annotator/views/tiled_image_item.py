@@ -0,0 +1,192 @@
+# src/artifacts_annotator/views/tiled_image_item.py
+import math
+from collections import OrderedDict
+from typing import Optional
+from PyQt5.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+from PyQt5.QtGui import QColor, QImage, QPainter, QPixmap
+from PyQt5.QtCore import QObject, QRectF, QRunnable, QThreadPool, pyqtSignal
+from PyQt5 import sip
+from ..config import load_settings
+from ..generators.thumbnail_loader import pil_to_qimage
+from ..generators.tile_source import TileSource
+
+TileKey = tuple[str, int, int, int]  # (path, level, tx, ty)
+
+class TileCache:
+    """LRU of decoded tile pixmaps, bounded by their size in bytes (GUI thread only)."""
+    def __init__(self, max_bytes: int = 256 << 20) -> None:
+        self.max_bytes = max_bytes
+        self._tiles: OrderedDict[TileKey, QPixmap] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: TileKey) -> Optional[QPixmap]:
+        pix = self._tiles.get(key)
+        if pix is not None:
+            self._tiles.move_to_end(key)
+        return pix
+
+    def put(self, key: TileKey, pix: QPixmap) -> None:
+        old = self._tiles.pop(key, None)
+        if old is not None:
+            self._bytes -= _pixmap_bytes(old)
+        self._tiles[key] = pix
+        self._bytes += _pixmap_bytes(pix)
+        while self._bytes > self.max_bytes and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self._bytes -= _pixmap_bytes(evicted)
+
+def _pixmap_bytes(pix: QPixmap) -> int:
+    return pix.width() * pix.height() * 4
+
+class _TileSignal(QObject):
+    ready = pyqtSignal(object, QImage, int)  # key, tile, generation
+
+class _TileTask(QRunnable):
+    def __init__(self, source: TileSource, key: TileKey, signal, generation: int) -> None:
+        super().__init__()
+        self.source = source
+        self.key = key
+        self.signal = signal
+        self.generation = generation
+
+    def run(self) -> None:
+        _, level, tx, ty = self.key
+        try:
+            image = pil_to_qimage(self.source.read_tile(level, tx, ty))
+        except Exception:
+            image = QImage()
+        self.signal.emit(self.key, image, self.generation)
+
+class TileLoader:
+    """Decodes tiles on a thread pool and stores them in a shared TileCache."""
+    def __init__(self, cache: Optional[TileCache] = None, max_threads: Optional[int] = None) -> None:
+        cfg = load_settings().get("viewer") or {}
+        self.cache = cache or TileCache(int(float(cfg.get("tile_cache_mb", 256)) * (1 << 20)))
+        self.pool = QThreadPool()
+        threads = max_threads or cfg.get("tile_threads")
+        if threads:
+            self.pool.setMaxThreadCount(max(1, int(threads)))
+        self.signals = _TileSignal()
+        self.signals.ready.connect(self._on_ready)
+        self._generation = 0
+        self._pending: set = set()
+        self._items: dict[str, "TiledImageItem"] = {}
+
+    def request(self, item: "TiledImageItem", key: TileKey) -> None:
+        if key in self._pending:
+            return
+        self._pending.add(key)
+        self._items[key[0]] = item
+        # Coarser levels first: they cover more of the view per decode.
+        self.pool.start(_TileTask(item.source, key, self.signals.ready, self._generation),
+                        key[1])
+
+    def cancel(self) -> None:
+        """Drop queued tiles (e.g. when switching images)."""
+        self.pool.clear()
+        self._pending.clear()
+        self._items.clear()
+        self._generation += 1
+
+    def _on_ready(self, key: TileKey, image: QImage, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._pending.discard(key)
+        if image.isNull():
+            return
+        self.cache.put(key, QPixmap.fromImage(image))
+        item = self._items.get(key[0])
+        if item is not None and not sip.isdeleted(item) and item.scene() is not None:
+            item.update(item.tile_rect(key[1], key[2], key[3]))
+
+class TiledImageItem(QGraphicsItem):
+    """
+    Image item that paints pyramid tiles matching the view's zoom level.
+
+    Only tiles intersecting the exposed area are drawn. Missing tiles are
+    requested from the TileLoader and temporarily drawn from a coarser
+    cached level, or as a flat placeholder.
+    """
+    def __init__(self, path: str, loader: TileLoader, source: Optional[TileSource] = None) -> None:
+        super().__init__()
+        self.path = path
+        self.loader = loader
+        self.source = source or TileSource(
+            path, int((load_settings().get("viewer") or {}).get("tile_size", 512))
+        )
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+        self.setZValue(-1)  # always below annotations
+
+    def width(self) -> int:
+        return self.source.size[0]
+
+    def height(self) -> int:
+        return self.source.size[1]
+
+    def boundingRect(self) -> QRectF:
+        return QRectF(0, 0, self.source.size[0], self.source.size[1])
+
+    def tile_rect(self, level: int, tx: int, ty: int) -> QRectF:
+        """Tile extent in item (full-resolution) coordinates."""
+        f = 1 << level
+        l, t, r, b = self.source.tile_box(level, tx, ty)
+        return QRectF(l * f, t * f, (r - l) * f, (b - t) * f)
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None) -> None:
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        level = self.source.level_for_scale(lod)
+        exposed = option.exposedRect.intersected(self.boundingRect())
+        if exposed.isEmpty():
+            return
+        painter.save()
+        painter.setClipRect(self.boundingRect())
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, lod < 1.0)
+        for tx, ty in self._tiles_in(level, exposed):
+            pix = self._tile(level, tx, ty)
+            if pix is not None:
+                painter.drawPixmap(self.tile_rect(level, tx, ty), pix, QRectF(pix.rect()))
+                continue
+            self.loader.request(self, (self.path, level, tx, ty))
+            self._paint_fallback(painter, level, tx, ty)
+        painter.restore()
+
+    def _tiles_in(self, level: int, rect: QRectF):
+        f = 1 << level
+        t = self.source.tile_size * f
+        cols, rows = self.source.tile_grid(level)
+        x0 = max(0, int(rect.left() // t))
+        y0 = max(0, int(rect.top() // t))
+        x1 = min(cols - 1, int(math.ceil(rect.right() / t)) - 1)
+        y1 = min(rows - 1, int(math.ceil(rect.bottom() / t)) - 1)
+        for ty in range(y0, y1 + 1):
+            for tx in range(x0, x1 + 1):
+                yield tx, ty
+
+    def _tile(self, level: int, tx: int, ty: int) -> Optional[QPixmap]:
+        key = (self.path, level, tx, ty)
+        pix = self.loader.cache.get(key)
+        if pix is None:
+            # Cropping from an already decoded level is cheap: do it inline.
+            tile = self.source.cached_tile(level, tx, ty)
+            if tile is not None:
+                pix = QPixmap.fromImage(pil_to_qimage(tile))
+                self.loader.cache.put(key, pix)
+        return pix
+
+    def _paint_fallback(self, painter: QPainter, level: int, tx: int, ty: int) -> None:
+        target = self.tile_rect(level, tx, ty)
+        for coarse in range(level + 1, self.source.level_count):
+            shift = coarse - level
+            key = (self.path, coarse, tx >> shift, ty >> shift)
+            pix = self.loader.cache.get(key)
+            if pix is None:
+                continue
+            parent = self.tile_rect(coarse, key[2], key[3])
+            sx = pix.width() / parent.width()
+            sy = pix.height() / parent.height()
+            src = QRectF((target.left() - parent.left()) * sx,
+                         (target.top() - parent.top()) * sy,
+                         target.width() * sx, target.height() * sy)
+            painter.drawPixmap(target, pix, src)
+            return
+        painter.fillRect(target, QColor(64, 64, 64))